@@ -1,11 +1,18 @@
 # bot/bot.py
 from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 
 from bot.handlers import router
 from middlewares import WhitelistMiddleware
 from config import config
 
-bot = Bot(config.bot_token)
+# custom Bot API server (local bot-api or the load-test stand-in)
+session = None
+if config.telegram_api_url:
+    session = AiohttpSession(api=TelegramAPIServer.from_base(config.telegram_api_url))
+
+bot = Bot(config.bot_token, session=session)
 dp = Dispatcher()
 
 dp.message.middleware(WhitelistMiddleware())
@@ -1,25 +1,30 @@
 # bot/handlers.py
+import html
+from datetime import datetime
+
 from aiogram.types import Message, CallbackQuery
-from aiogram.filters import CommandStart
+from aiogram.filters import Command, CommandStart
 from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
 from bot.states import AddWallet, AddToken
-from bot.keyboards import wallets_menu, main_menu, tokens_menu
+from bot.keyboards import wallets_menu, main_menu, tokens_menu, digest_menu, DIGEST_WINDOWS, DIGEST_MAX_EVENTS
 
 from sqlalchemy import select, update
-from sqlalchemy import func
 
-from db.models import User, Wallet, Token
+from db.models import DeadLetter, User, Wallet, Token, normalize_address, normalize_label
 from db.engine import AsyncSession
 
 from solana_tracker.parser import get_token_symbol
-from config import TOKEN_SYMBOLS
+from config import config, TOKEN_SYMBOLS
+from utils.events import events, UserChanged
 
 from loguru import logger
 
 
 router = Router()
 
+DEAD_LETTERS_SHOWN = 20
+
 # command /start
 @router.message(CommandStart())
 async def start_handler(message: Message):
@@ -52,6 +57,7 @@ async def start_handler(message: Message):
                 session.add(token)
             await session.commit()
             logger.success(f"Added default tokens for user {message.from_user.id}.")
+            await events.publish(UserChanged(message.from_user.id))
 
     await message.answer(
         "Главное меню",
@@ -110,6 +116,8 @@ async def toggle_wallet(cb: CallbackQuery):
         await session.commit()
         logger.info(f"Toggled wallet {wallet_id} to {wallet.enabled}")
 
+    await events.publish(UserChanged(cb.from_user.id))
+
     await cb.answer("Готово")
     await wallets_menu_handler(cb)
 
@@ -127,6 +135,8 @@ async def toggle_all_wallets(cb: CallbackQuery):
         await session.commit()
         logger.info(f"Set all wallets for user {cb.from_user.id} to {value}")
 
+    await events.publish(UserChanged(cb.from_user.id))
+
     await cb.answer("Готово")
     await wallets_menu_handler(cb)
 
@@ -159,11 +169,11 @@ async def add_wallet_input(msg: Message, state: FSMContext):
 
         # 🔍 Проверяем, есть ли уже такой label
         exists_label = await session.scalar(
-        select(Wallet).where(
-            Wallet.user_id == user.id,
-            func.lower(Wallet.label) == label.lower()
+            select(Wallet).where(
+                Wallet.user_id == user.id,
+                Wallet.label_norm == normalize_label(label)
+            )
         )
-    )
 
         if exists_label:
             await msg.answer("❌ Этот label уже используется")
@@ -173,7 +183,7 @@ async def add_wallet_input(msg: Message, state: FSMContext):
         exists_address = await session.scalar(
             select(Wallet).where(
                 Wallet.user_id == user.id,
-                Wallet.address == address
+                Wallet.address_norm == normalize_address(address)
             )
         )
         
@@ -191,6 +201,8 @@ async def add_wallet_input(msg: Message, state: FSMContext):
         await session.commit()
         logger.info(f"Added wallet {address} for user {msg.from_user.id}")
 
+    await events.publish(UserChanged(msg.from_user.id))
+
     await state.clear()
     await msg.answer(
         f"✅ Адрес `{address}` с меткой `{label}` добавлен",
@@ -207,6 +219,8 @@ async def toggle_token(cb: CallbackQuery):
         token.enabled = not token.enabled
         await session.commit()
 
+    await events.publish(UserChanged(cb.from_user.id))
+
     await cb.answer("Готово")
     await tokens_menu_handler(cb)
 
@@ -224,6 +238,8 @@ async def toggle_all_tokens(cb: CallbackQuery):
         await session.commit()
         logger.info(f"Set all tokens for user {cb.from_user.id} to {value}")
 
+    await events.publish(UserChanged(cb.from_user.id))
+
     await cb.answer("Готово")
     await tokens_menu_handler(cb)
 
@@ -274,12 +290,71 @@ async def add_token_input(msg: Message, state: FSMContext):
         session.add(token)
         await session.commit()
 
+    await events.publish(UserChanged(msg.from_user.id))
     await state.clear()
     await msg.answer(
         f"✅ Token `{token_symbol}` добавлен",
         reply_markup=main_menu(user.enabled)
     )
 
+# Digest
+def next_value(options: tuple[int, ...], current: int) -> int:
+    bigger = [value for value in options if value > current]
+    return bigger[0] if bigger else options[0]
+
+@router.callback_query(F.data == "menu:digest")
+async def digest_menu_handler(cb: CallbackQuery):
+    async with AsyncSession() as session:
+        user = await session.scalar(
+            select(User).where(User.telegram_id == cb.from_user.id)
+        )
+
+    await cb.message.edit_text(
+        "Дайджест: серии транзакций одного адреса приходят одним сообщением.\n"
+        "🧾 у адреса в списке адресов: · как в настройке, ✅ всегда, ❌ никогда",
+        reply_markup=digest_menu(
+            config.digest if user.digest is None else user.digest,
+            user.digest_window or config.digest_window,
+            user.digest_max_events or config.digest_max_events
+        )
+    )
+
+@router.callback_query(F.data.in_(["toggle:digest", "digest:window", "digest:max"]))
+async def change_digest(cb: CallbackQuery):
+    async with AsyncSession() as session:
+        user = await session.scalar(
+            select(User).where(User.telegram_id == cb.from_user.id)
+        )
+        if cb.data == "toggle:digest":
+            user.digest = not (config.digest if user.digest is None else user.digest)
+        elif cb.data == "digest:window":
+            user.digest_window = next_value(DIGEST_WINDOWS, user.digest_window or config.digest_window)
+        else:
+            user.digest_max_events = next_value(DIGEST_MAX_EVENTS, user.digest_max_events or config.digest_max_events)
+        await session.commit()
+        logger.info(f"Digest for user {cb.from_user.id}: {user.digest} {user.digest_window}s {user.digest_max_events}")
+
+    await events.publish(UserChanged(cb.from_user.id))
+
+    await cb.answer("Готово")
+    await digest_menu_handler(cb)
+
+@router.callback_query(F.data.startswith("digest:wallet:"))
+async def toggle_wallet_digest(cb: CallbackQuery):
+    wallet_id = int(cb.data.split(":")[2])
+
+    async with AsyncSession() as session:
+        wallet = await session.get(Wallet, wallet_id)
+        # follow the user -> on -> off -> follow the user
+        wallet.digest = {None: True, True: False, False: None}[wallet.digest]
+        await session.commit()
+        logger.info(f"Digest for wallet {wallet_id}: {wallet.digest}")
+
+    await events.publish(UserChanged(cb.from_user.id))
+
+    await cb.answer("Готово")
+    await wallets_menu_handler(cb)
+
 # All switch user enable/disable
 @router.callback_query(F.data == "toggle:user")
 async def toggle_user(cb: CallbackQuery):
@@ -290,9 +365,41 @@ async def toggle_user(cb: CallbackQuery):
         user.enabled = not user.enabled
         await session.commit()
 
+    await events.publish(UserChanged(cb.from_user.id))
+
     await cb.answer("Переключено")
     await cb.message.edit_text(
         "Главное меню",
     reply_markup=main_menu(user.enabled)
 )
 
+
+# command /deadletters: jobs for the user's wallets that ran out of retries
+@router.message(Command("deadletters"))
+async def dead_letters_handler(message: Message):
+    async with AsyncSession() as session:
+        labels = dict((await session.execute(
+            select(Wallet.address, Wallet.label).join(User).where(
+                User.telegram_id == message.from_user.id
+            )
+        )).all())
+        letters = (await session.execute(
+            select(DeadLetter)
+            .where(DeadLetter.wallet.in_(labels))
+            .order_by(DeadLetter.id.desc())
+            .limit(DEAD_LETTERS_SHOWN)
+        )).scalars().all() if labels else []
+
+    if not letters:
+        await message.answer("Необработанных транзакций нет ✅")
+        return
+
+    lines = [f"☠️ <b>Необработанные транзакции</b> (последние {len(letters)})", ""]
+    for letter in letters:
+        failed_at = datetime.fromtimestamp(letter.failed_at).strftime("%d.%m %H:%M")
+        lines.append(
+            f"{failed_at} · {html.escape(labels.get(letter.wallet, letter.wallet))} · "
+            f"<a href='https://solscan.io/tx/{letter.signature}'>{letter.signature[:8]}…</a>\n"
+            f"<i>{html.escape(letter.reason)}</i> ({letter.attempts} попыток)"
+        )
+    await message.answer("\n".join(lines), parse_mode="HTML", disable_web_page_preview=True)
@@ -1,3 +1,4 @@
 from .main import main_menu
 from .wallets import wallets_menu
 from .tokens import tokens_menu
+from .digest import digest_menu, DIGEST_WINDOWS, DIGEST_MAX_EVENTS
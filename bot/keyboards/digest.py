@@ -0,0 +1,16 @@
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+# values the buttons cycle through
+DIGEST_WINDOWS = (30, 60, 300, 900)
+DIGEST_MAX_EVENTS = (5, 10, 20, 50)
+
+
+def digest_menu(enabled: bool, window: int, max_events: int):
+    emoji = "🟢" if enabled else "🔴"
+    window_text = f"{window // 60} мин" if window >= 60 else f"{window} с"
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=f"{emoji} Дайджест", callback_data="toggle:digest")],
+        [InlineKeyboardButton(text=f"⏱ Окно: {window_text}", callback_data="digest:window")],
+        [InlineKeyboardButton(text=f"📦 Не больше {max_events} событий", callback_data="digest:max")],
+        [InlineKeyboardButton(text="⬅ Назад", callback_data="menu:main")]
+    ])
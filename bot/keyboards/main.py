@@ -5,5 +5,6 @@ def main_menu(enabled: bool):
     return InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="📍 Адреса", callback_data="menu:wallets")],
         [InlineKeyboardButton(text="🪙 Токены", callback_data="menu:tokens")],
+        [InlineKeyboardButton(text="🧾 Дайджест", callback_data="menu:digest")],
         [InlineKeyboardButton(text=f"{emoji} Отслеживание", callback_data="toggle:user")]
     ])
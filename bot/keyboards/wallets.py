@@ -1,5 +1,9 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
+# per-wallet digest: follow the user setting -> on -> off
+DIGEST_STATES = {None: "🧾 ·", True: "🧾 ✅", False: "🧾 ❌"}
+
+
 def wallets_menu(wallets):
     kb = []
 
@@ -9,6 +13,10 @@ def wallets_menu(wallets):
             InlineKeyboardButton(
                 text=f"{emoji} {w.label}",
                 callback_data=f"toggle:wallet:{w.id}"
+            ),
+            InlineKeyboardButton(
+                text=DIGEST_STATES[w.digest],
+                callback_data=f"digest:wallet:{w.id}"
             )
         ])
 
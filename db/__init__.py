@@ -1,3 +1,3 @@
-from .models import Base, User, Wallet, Token
-from .engine import engine, AsyncSession
+from .models import Base, User, Wallet, Token, TokenMetadata, WalletCursor, DeadLetter, TransactionEvent, SchemaVersion, NodeLease, LeaderLease
+from .engine import engine, AsyncSession, insert_ignore
 from .init import init_db
\ No newline at end of file
@@ -1,12 +1,88 @@
 # db/engine.py
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker
 from config import config
 
-engine = create_async_engine(
-    config.database_path,
-    echo=False,
-    pool_size=10,
-    max_overflow=20,
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",          # readers don't block the writer (and vice versa)
+    "PRAGMA synchronous=NORMAL",        # fsync on checkpoint only, safe with WAL
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",         # ~16 MB page cache per connection
 )
 
+
+def database_url(raw: str) -> URL:
+    url = make_url(raw)
+    # plain postgres:// URLs (Heroku, docker-compose, ...) get the async driver
+    if url.drivername in ("postgres", "postgresql", "postgresql+psycopg2"):
+        url = url.set(drivername="postgresql+asyncpg")
+    return url
+
+
+def is_memory_sqlite(url: URL) -> bool:
+    return url.database in (None, "", ":memory:") or "mode=memory" in str(url)
+
+
+def create_sqlite_engine(url: URL) -> AsyncEngine:
+    if is_memory_sqlite(url):
+        return create_async_engine(url, echo=False)
+
+    Path(url.database).parent.mkdir(parents=True, exist_ok=True)
+
+    # one writer at a time anyway: a few connections cover concurrent readers
+    engine = create_async_engine(
+        url,
+        echo=False,
+        pool_size=config.db_pool_size,
+        max_overflow=config.db_max_overflow,
+    )
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout={config.sqlite_busy_timeout_ms}")
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+        cursor.close()
+
+    return engine
+
+
+def create_postgres_engine(url: URL) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=False,
+        pool_size=config.db_pool_size,
+        max_overflow=config.db_max_overflow,
+        pool_timeout=config.db_pool_timeout,
+        pool_recycle=1800,          # drop connections before server/proxy idle timeouts do
+        pool_pre_ping=True,
+    )
+
+
+def create_engine(raw_url: str) -> AsyncEngine:
+    url = database_url(raw_url)
+    backend = url.get_backend_name()
+
+    if backend == "sqlite":
+        return create_sqlite_engine(url)
+    if backend == "postgresql":
+        return create_postgres_engine(url)
+    return create_async_engine(url, echo=False, pool_size=config.db_pool_size, max_overflow=config.db_max_overflow)
+
+
+def insert_ignore(table):
+    """INSERT ... ON CONFLICT DO NOTHING for the configured backend."""
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table).on_conflict_do_nothing()
+
+
+engine = create_engine(config.database_path)
+
 AsyncSession = async_sessionmaker(engine, expire_on_commit=False)
@@ -1,10 +1,13 @@
 # db/init.py
-from pathlib import Path
+from loguru import logger
 from db.engine import engine
 from db.models import Base
+from db.migrations import run_migrations
 
 async def init_db():
-    Path("./data").mkdir(exist_ok=True)
-
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        applied = await conn.run_sync(run_migrations)
+
+    if applied:
+        logger.info(f"✅ Schema migrated: {applied}")
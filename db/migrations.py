@@ -0,0 +1,106 @@
+# db/migrations.py
+#
+# Versioned, in-place schema upgrades. `create_all` only creates missing tables,
+# so anything that changes an existing table (new columns, indexes, backfills)
+# goes here as a numbered step. Applied versions are recorded in `schema_versions`;
+# every step checks the live schema first, so it is also a no-op on a fresh
+# database where `create_all` already built the current layout.
+import time
+from typing import Callable
+
+from loguru import logger
+from sqlalchemy import Column, Connection, Table, bindparam, inspect, insert, select, text, update
+
+from db.models import SchemaVersion, Token, User, Wallet, normalize_address, normalize_label
+
+
+def add_column(conn: Connection, table: Table, column: Column) -> bool:
+    existing = {c["name"] for c in inspect(conn).get_columns(table.name)}
+    if column.name in existing:
+        return False
+
+    # the same type, server default and NOT NULL that create_all would emit,
+    # so a migrated table matches a fresh one
+    spec = conn.dialect.ddl_compiler(conn.dialect, None).get_column_specification(column)
+    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {spec}"))
+    return True
+
+
+def create_indexes(conn: Connection, table: Table):
+    for index in table.indexes:
+        index.create(conn, checkfirst=True)
+
+
+def m001_normalized_lookups(conn: Connection):
+    wallets, tokens = Wallet.__table__, Token.__table__
+
+    add_column(conn, wallets, wallets.c.address_norm)
+    add_column(conn, wallets, wallets.c.label_norm)
+    add_column(conn, tokens, tokens.c.symbol_norm)
+
+    # normalized in python: see normalize_label
+    rows = [
+        {"_id": id_, "_address": normalize_address(address), "_label": normalize_label(label)}
+        for id_, address, label in conn.execute(select(wallets.c.id, wallets.c.address, wallets.c.label))
+    ]
+    if rows:
+        conn.execute(
+            update(wallets)
+            .where(wallets.c.id == bindparam("_id"))
+            .values(address_norm=bindparam("_address"), label_norm=bindparam("_label")),
+            rows
+        )
+
+    rows = [
+        {"_id": id_, "_symbol": normalize_label(symbol)}
+        for id_, symbol in conn.execute(select(tokens.c.id, tokens.c.symbol))
+    ]
+    if rows:
+        conn.execute(
+            update(tokens)
+            .where(tokens.c.id == bindparam("_id"))
+            .values(symbol_norm=bindparam("_symbol")),
+            rows
+        )
+
+    create_indexes(conn, wallets)
+    create_indexes(conn, tokens)
+
+
+def m002_wallet_policy(conn: Connection):
+    wallets = Wallet.__table__
+
+    # existing rows get the server default
+    add_column(conn, wallets, wallets.c.weight)
+    add_column(conn, wallets, wallets.c.rate_cap)
+
+
+def m003_digest_settings(conn: Connection):
+    users, wallets = User.__table__, Wallet.__table__
+
+    add_column(conn, users, users.c.digest)
+    add_column(conn, users, users.c.digest_window)
+    add_column(conn, users, users.c.digest_max_events)
+    add_column(conn, wallets, wallets.c.digest)
+
+
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "normalized lookup columns", m001_normalized_lookups),
+    (2, "wallet weight and rate cap", m002_wallet_policy),
+    (3, "digest settings", m003_digest_settings),
+]
+
+
+def run_migrations(conn: Connection) -> list[int]:
+    """Apply pending migrations in order. Runs inside the caller's transaction."""
+    applied = set(conn.execute(select(SchemaVersion.version)).scalars())
+
+    done = []
+    for version, name, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        logger.info(f"🛠 Applying migration {version}: {name}")
+        migrate(conn)
+        conn.execute(insert(SchemaVersion).values(version=version, name=name, applied_at=time.time()))
+        done.append(version)
+    return done
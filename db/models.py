@@ -1,10 +1,19 @@
 # db/models.py
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy import BigInteger, Boolean, ForeignKey, String
-from sqlalchemy import UniqueConstraint
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, validates
+from sqlalchemy import BigInteger, Boolean, Float, ForeignKey, Integer, String
+from sqlalchemy import Index, UniqueConstraint
 
 from sqlalchemy.orm import relationship
 
+
+def normalize_address(address: str) -> str:
+    # base58 is case-sensitive: only whitespace is insignificant
+    return address.strip()
+
+def normalize_label(label: str) -> str:
+    # python-side lower(): SQLite's lower() only folds ASCII, labels are often Cyrillic
+    return label.strip().lower()
+
 class Base(DeclarativeBase):
     pass
 
@@ -15,6 +24,10 @@ class User(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     telegram_id: Mapped[int] = mapped_column(BigInteger, unique=True)
     enabled: Mapped[bool] = mapped_column(Boolean, default=True)
+    # digest mode (see workers/digest.py); NULL = the DIGEST* defaults from config
+    digest: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
+    digest_window: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    digest_max_events: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
     wallets = relationship("Wallet", back_populates="user")
     tokens = relationship("Token", back_populates="user")
@@ -27,12 +40,31 @@ class Wallet(Base):
     address: Mapped[str] = mapped_column(String, index=True)
     label: Mapped[str]
     enabled: Mapped[bool] = mapped_column(Boolean, default=True)
+    # lookup columns, kept in sync by the validators below (see db/migrations.py)
+    address_norm: Mapped[str | None] = mapped_column(String, nullable=True)
+    label_norm: Mapped[str | None] = mapped_column(String, nullable=True)
+    # scheduling policy (see solana_tracker/fairness.py); NULL rate_cap = WALLET_RATE_CAP
+    weight: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
+    rate_cap: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    digest: Mapped[bool | None] = mapped_column(Boolean, nullable=True)   # NULL = follow the user
 
     __table_args__ = (
         UniqueConstraint("user_id", "address", name="uq_user_wallet"),
+        Index("ix_wallets_user_address_norm", "user_id", "address_norm"),
+        Index("ix_wallets_user_label_norm", "user_id", "label_norm"),
     )
     user = relationship("User", back_populates="wallets")
 
+    @validates("address")
+    def _sync_address_norm(self, key, value):
+        self.address_norm = normalize_address(value)
+        return value
+
+    @validates("label")
+    def _sync_label_norm(self, key, value):
+        self.label_norm = normalize_label(value)
+        return value
+
 class Token(Base):
     __tablename__ = "tokens"
 
@@ -41,8 +73,96 @@ class Token(Base):
     mint: Mapped[str] = mapped_column(String, index=True)
     symbol: Mapped[str]
     enabled: Mapped[bool] = mapped_column(Boolean, default=True)
+    symbol_norm: Mapped[str | None] = mapped_column(String, nullable=True)
 
     __table_args__ = (
         UniqueConstraint("user_id", "mint", name="uq_user_token"),
+        Index("ix_tokens_user_symbol_norm", "user_id", "symbol_norm"),
     )
     user = relationship("User", back_populates="tokens")
+
+    @validates("symbol")
+    def _sync_symbol_norm(self, key, value):
+        self.symbol_norm = normalize_label(value)
+        return value
+
+class TokenMetadata(Base):
+    __tablename__ = "token_metadata"
+
+    mint: Mapped[str] = mapped_column(String, primary_key=True)
+    symbol: Mapped[str | None] = mapped_column(String, nullable=True)   # None = no metadata (negative cache)
+    fetched_at: Mapped[float] = mapped_column(Float)
+
+class WalletCursor(Base):
+    __tablename__ = "wallet_cursors"
+
+    address: Mapped[str] = mapped_column(String, primary_key=True)
+    signature: Mapped[str] = mapped_column(String)     # last signature seen for the wallet
+    slot: Mapped[int] = mapped_column(BigInteger)
+    updated_at: Mapped[float] = mapped_column(Float)
+
+class DeadLetter(Base):
+    __tablename__ = "dead_letters"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    signature: Mapped[str] = mapped_column(String, index=True)
+    wallet: Mapped[str] = mapped_column(String)
+    attempts: Mapped[int] = mapped_column(Integer)
+    reason: Mapped[str] = mapped_column(String)
+    failed_at: Mapped[float] = mapped_column(Float)
+
+class TransactionEvent(Base):
+    __tablename__ = "transaction_events"
+
+    # one row per (tx, tracked wallet): the same signature can touch several wallets
+    signature: Mapped[str] = mapped_column(String, primary_key=True)
+    wallet: Mapped[str] = mapped_column(String, primary_key=True)
+    side: Mapped[str] = mapped_column(String)              # SWAP / TRANSFER / SKIPPED
+    sent_mint: Mapped[str | None] = mapped_column(String, nullable=True)
+    sent_amount: Mapped[float | None] = mapped_column(Float, nullable=True)
+    recv_mint: Mapped[str | None] = mapped_column(String, nullable=True)
+    recv_amount: Mapped[float | None] = mapped_column(Float, nullable=True)
+    description: Mapped[str | None] = mapped_column(String, nullable=True)
+    created_at: Mapped[float] = mapped_column(Float)
+
+    __table_args__ = (
+        Index("ix_events_wallet_time", "wallet", "created_at"),
+        Index("ix_events_sent_mint_time", "sent_mint", "created_at"),
+        Index("ix_events_recv_mint_time", "recv_mint", "created_at"),
+        Index("ix_events_time", "created_at"),
+    )
+
+class SchemaVersion(Base):
+    __tablename__ = "schema_versions"
+
+    version: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String)
+    applied_at: Mapped[float] = mapped_column(Float)
+
+class NodeLease(Base):
+    __tablename__ = "node_leases"
+
+    # one row per tracker process in sharded mode, see utils/sharding.py
+    node_id: Mapped[str] = mapped_column(String, primary_key=True)
+    heartbeat_at: Mapped[float] = mapped_column(Float)
+    started_at: Mapped[float] = mapped_column(Float)
+
+class LeaderLease(Base):
+    __tablename__ = "leader_leases"
+
+    role: Mapped[str] = mapped_column(String, primary_key=True)
+    node_id: Mapped[str] = mapped_column(String)
+    expires_at: Mapped[float] = mapped_column(Float)
+
+class UserChange(Base):
+    __tablename__ = "user_changes"
+
+    # sharded mode: a user edited through the bot on the poller node, picked up
+    # by every other node on its next heartbeat (see utils/sharding.py)
+    id: Mapped[int] = mapped_column(primary_key=True)
+    telegram_id: Mapped[int] = mapped_column(BigInteger)
+    node_id: Mapped[str] = mapped_column(String)
+    changed_at: Mapped[float] = mapped_column(Float, index=True)
+
+    # ids are a cursor: SQLite must not reuse them once old rows are pruned
+    __table_args__ = {"sqlite_autoincrement": True}
@@ -0,0 +1,238 @@
+# loadtest/__main__.py
+#
+# Offline end-to-end load test:
+#   logsNotification -> queue -> parse_transaction -> send_message
+# against local stand-ins for Helius (REST, RPC, websocket) and the Telegram Bot API.
+#
+#   python -m loadtest --rate 200 --duration 30 --wallets 100 --users 5
+#
+import argparse
+import asyncio
+import os
+import random
+import resource
+import statistics
+import tempfile
+import time
+
+from loadtest.environment import configure_env, seed_database
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="SolTracker offline load test")
+    parser.add_argument("--rate", type=float, default=50, help="transactions per second to replay")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to replay for")
+    parser.add_argument("--drain", type=float, default=15, help="seconds to wait for in-flight txs afterwards")
+    parser.add_argument("--wallets", type=int, default=50)
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--min-workers", type=int, default=2, help="tx_worker pool lower bound")
+    parser.add_argument("--max-workers", type=int, default=16, help="tx_worker pool upper bound")
+    parser.add_argument("--ingest-depth", type=int, default=50_000, help="ingest queue max depth")
+    parser.add_argument("--index-lag", type=float, default=0.0, help="seconds before the REST API knows a tx")
+    parser.add_argument("--hot-share", type=float, default=0.0, help="share of the traffic sent by wallet 0")
+    parser.add_argument("--rate-cap", type=int, default=0, help="WALLET_RATE_CAP")
+    parser.add_argument("--fast", action="store_true", help="FAST_MODE: provisional alerts edited once confirmed")
+    parser.add_argument("--digest", type=int, default=0, metavar="WINDOW",
+                        help="turn digest mode on for everyone with this window in seconds")
+    parser.add_argument("--helius-latency", type=float, default=0.0, help="seconds each /v0/transactions call takes")
+    parser.add_argument("--helius-capacity", type=int, default=0,
+                        help="concurrent /v0/transactions calls before the fake answers 429, 0 = unlimited")
+    parser.add_argument("--classifier-processes", type=int, default=0, help="CLASSIFIER_PROCESSES")
+    parser.add_argument("--mix", default="swap=0.5,transfer=0.25,spam=0.15,unknown=0.1")
+    parser.add_argument("--telegram-limits", action="store_true", help="keep the real per-chat/global send limits")
+    parser.add_argument("--helius-port", type=int, default=18899)
+    parser.add_argument("--telegram-port", type=int, default=18898)
+    return parser.parse_args()
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return 0.0
+
+
+async def run(args):
+    from loguru import logger
+
+    from db import init_db, engine
+    from loadtest.fake_servers import FakeHelius, FakeTelegram, start_app, wait_for_subscriptions
+    from loadtest.fixtures import NOTIFYING_KINDS, make_transaction, pick_kind, random_address
+    from solana_tracker import token_cache, cursor_store, event_store, create_ingest_queue, HeliusClient
+    from solana_tracker.helius import limit_decreases
+    from solana_tracker.classifier import start_executor, shutdown_executor
+    from solana_tracker.prefilter import prefilter_skipped
+    from metrics import classifier_batches
+    from solana_tracker.fairness import rate_capped
+    from utils import WalletDispatcher, routing_index
+    from workers import WorkerPool, notifier, retry_scheduler, confirmations, digests
+    from bot import bot
+
+    logger.remove()
+    logger.add(lambda m: print(m, end=""), level="WARNING")
+
+    mix = {k: float(v) for k, v in (item.split("=") for item in args.mix.split(","))}
+
+    helius, telegram = FakeHelius(args.index_lag, args.helius_latency, args.helius_capacity), FakeTelegram()
+    runners = [
+        await start_app(helius.app(), args.helius_port),
+        await start_app(telegram.app(), args.telegram_port),
+    ]
+
+    wallets = [random_address() for _ in range(args.wallets)]
+    await init_db()
+    await seed_database(wallets, args.users)
+    await routing_index.load()
+
+    queue = create_ingest_queue()
+    await start_executor()
+    client = HeliusClient()
+    await token_cache.start(client)
+    await cursor_store.load()
+    await event_store.load()
+    await queue.load()
+
+    dispatcher = WalletDispatcher(queue, client)
+    worker_pool = WorkerPool(queue, client, args.min_workers, args.max_workers)
+    tasks = [
+        asyncio.create_task(dispatcher.run()),
+        asyncio.create_task(notifier.run()),
+        asyncio.create_task(retry_scheduler.run(queue)),
+        asyncio.create_task(worker_pool.run()),
+        asyncio.create_task(event_store.run()),
+    ]
+    await wait_for_subscriptions(helius, wallets)
+    print(f"▶ {len(wallets)} wallets subscribed, replaying {args.rate} tx/s for {args.duration}s")
+
+    published: dict[str, tuple[float, str]] = {}
+    hot = set()
+    depth: list[tuple[float, int]] = []
+    peak_rss = rss_mb()
+    peak_workers = 0
+    started = time.monotonic()
+
+    async def sample():
+        nonlocal peak_rss, peak_workers
+        while True:
+            depth.append((time.monotonic() - started, queue.qsize()))
+            peak_workers = max(peak_workers, len(worker_pool.workers))
+            peak_rss = max(peak_rss, rss_mb())
+            await asyncio.sleep(0.5)
+
+    sampler = asyncio.create_task(sample())
+
+    interval = 1 / args.rate
+    next_at = started
+    while time.monotonic() - started < args.duration:
+        kind = pick_kind(mix)
+        if random.random() < args.hot_share:
+            wallet = wallets[0]
+        else:
+            wallet = wallets[len(published) % len(wallets)]
+        tx, logs = make_transaction(kind, wallet)
+        if await helius.publish(wallet, tx, logs):
+            published[tx["signature"]] = (time.monotonic(), kind)
+            if wallet == wallets[0]:
+                hot.add(tx["signature"])
+        next_at += interval
+        await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+    replay_time = time.monotonic() - started
+
+    expected = {sig for sig, (_, kind) in published.items() if kind in NOTIFYING_KINDS}
+
+    def settled() -> bool:
+        if args.digest:
+            # digests only link their last tx: wait for the pipeline to empty instead
+            return not queue.depth and not len(digests) and not notifier.pending
+        return expected <= telegram.delivered.keys()
+
+    deadline = time.monotonic() + args.drain
+    while time.monotonic() < deadline and not settled():
+        await asyncio.sleep(0.1)
+    total_time = time.monotonic() - started
+
+    final_workers = len(worker_pool.workers)
+    sampler.cancel()
+    for task in [*tasks, *worker_pool.workers]:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await dispatcher.pool.close()
+    await event_store.flush()
+    stored_events = await event_store.count()
+    await client.aclose()
+    await bot.session.close()
+    shutdown_executor()
+    # aiosqlite connections hold non-daemon threads
+    await engine.dispose()
+    queue.close()
+    for runner in runners:
+        await runner.cleanup()
+
+    latencies = [
+        telegram.delivered[sig] - published[sig][0]
+        for sig in expected if sig in telegram.delivered
+    ]
+    finals = [
+        telegram.edited.get(sig, telegram.delivered[sig]) - published[sig][0]
+        for sig in expected if sig in telegram.delivered
+    ]
+    quiet = [
+        telegram.delivered[sig] - published[sig][0]
+        for sig in expected - hot if sig in telegram.delivered
+    ]
+    delivered = len(latencies)
+    depths = [d for _, d in depth]
+
+    print()
+    print(f"published      {len(published)} txs in {replay_time:.1f}s ({len(published) / replay_time:.1f} tx/s)")
+    print(f"delivered      {delivered}/{len(expected)} alerts, {telegram.messages} Telegram calls")
+    print(f"throughput     {delivered / total_time:.1f} alerts/s end-to-end")
+    print(f"{'first ms' if args.fast else 'latency ms':<15}p50={percentile(latencies, 50) * 1000:.0f} "
+          f"p95={percentile(latencies, 95) * 1000:.0f} "
+          f"p99={percentile(latencies, 99) * 1000:.0f} "
+          f"max={max(latencies, default=0) * 1000:.0f}")
+    if args.fast:
+        print(f"final ms       p50={percentile(finals, 50) * 1000:.0f} "
+              f"p95={percentile(finals, 95) * 1000:.0f} "
+              f"max={max(finals, default=0) * 1000:.0f}, "
+              f"{confirmations.provisional} provisional, {confirmations.confirmed} edited, "
+              f"{confirmations.retracted} retracted")
+    if args.digest:
+        print(f"digest         {digests.folded} alerts folded into {digests.digests} digests")
+    if args.hot_share:
+        print(f"quiet wallets  p50={percentile(quiet, 50) * 1000:.0f} "
+              f"p95={percentile(quiet, 95) * 1000:.0f} ms, "
+              f"hot wallet sent {len(hot)}, {rate_capped.value():.0f} rate-capped")
+    if depths:
+        print(f"queue depth    avg={statistics.mean(depths):.1f} max={max(depths)}")
+        timeline = depth[::max(1, len(depth) // 10)]
+        print("               " + "  ".join(f"{t:.0f}s:{d}" for t, d in timeline))
+    print(f"event store    {stored_events} rows")
+    print(f"ingest         {queue.depth} unacked, {queue.shed} shed")
+    print(f"helius limit   {client.limit.limit:.0f} final, {limit_decreases.value():.0f} backoffs, "
+          f"{helius.rejected} answered 429, peak {helius.max_concurrent} concurrent")
+    print(f"helius calls   {helius.requests} /v0/transactions requests, "
+          f"{prefilter_skipped.value(rule='system-spam'):.0f} spam notifications prefiltered")
+    print(f"worker pool    peak={peak_workers} final={final_workers}")
+    print(f"classifier     {classifier_batches.value(where='pool'):.0f} batches on {args.classifier_processes} processes, "
+          f"{classifier_batches.value(where='inline'):.0f} inline")
+    print(f"memory         rss peak={peak_rss:.1f} MB maxrss={resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_env(args, workdir)
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
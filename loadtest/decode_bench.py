@@ -0,0 +1,166 @@
+# loadtest/decode_bench.py
+#
+# Microbenchmark: decoding a /v0/transactions response body into what tx_worker
+# keeps, plain dicts (`resp.json()`) against solana_tracker.schema, per transaction.
+#
+#   python -m loadtest.decode_bench --batch 100 --rounds 50
+#
+# CPU is the best of `--rounds` timed decodes. Memory is measured with tracemalloc:
+# `retained` is what stays alive while the batch waits for classification,
+# `peak` includes the garbage the decoder produced on the way.
+import argparse
+import json
+import os
+import pickle
+import random
+import time
+import tracemalloc
+
+# config.py (imported by the fixtures) reads the environment at import time
+for name, value in {
+    "TELEGRAM_BOT_TOKEN": "123456:LOADTEST",
+    "WHITELISTED_USER_IDS": "1",
+    "WSS_SOLANA_RPC_URL": "ws://127.0.0.1",
+    "WSS_HELIUS_RPC_URL": "ws://127.0.0.1",
+    "HELIUS_API_KEY": "loadtest",
+}.items():
+    os.environ.setdefault(name, value)
+
+import msgspec  # noqa: E402
+
+from loadtest.fixtures import make_transaction, random_address  # noqa: E402
+from solana_tracker.schema import TxEvent, decode_transactions  # noqa: E402
+
+KINDS = ["swap", "transfer", "spam", "unknown"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Helius payload decoding microbenchmark")
+    parser.add_argument("--batch", type=int, default=100, help="transactions per response body")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--accounts", type=int, default=16, help="accountData / instruction accounts per tx")
+    return parser.parse_args()
+
+
+def enhanced(kind: str, wallet: str, accounts: int) -> dict:
+    """A fixture padded with the parts of a real enhanced transaction the tracker never reads."""
+    tx, _ = make_transaction(kind, wallet)
+    keys = [wallet] + [random_address() for _ in range(accounts - 1)]
+    tx.update({
+        "timestamp": int(time.time()),
+        "slot": random.randint(250_000_000, 300_000_000),
+        "feePayer": wallet,
+        "transactionError": None,
+        "accountData": [
+            {"account": key, "nativeBalanceChange": random.randint(-10**6, 10**6), "tokenBalanceChanges": []}
+            for key in keys
+        ],
+        "instructions": [
+            {
+                "programId": random_address(),
+                "accounts": random.sample(keys, min(8, len(keys))),
+                "data": random_address(64),
+                "innerInstructions": [
+                    {"programId": random_address(), "accounts": keys[:4], "data": random_address(32)}
+                    for _ in range(3)
+                ]
+            }
+            for _ in range(4)
+        ],
+        "events": {"swap": {"nativeInput": None, "nativeOutput": None, "tokenInputs": [], "tokenOutputs": []}},
+    })
+    return tx
+
+
+def decode_dicts(body: bytes) -> dict:
+    data = json.loads(body)
+    return {tx["signature"]: tx for tx in data if tx and tx.get("signature")}
+
+
+def decode_typed(body: bytes) -> dict:
+    return {tx.signature: tx for tx in decode_transactions(body)}
+
+
+def best_time(decode, body: bytes, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        decode(body)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def memory(decode, body: bytes) -> tuple[int, int]:
+    tracemalloc.start()
+    try:
+        kept = decode(body)
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del kept
+    return retained, peak
+
+
+def event_dict(event: TxEvent) -> dict:
+    # the shape classify() used to return for a swap
+    return {
+        "signature": event.signature, "wallet": event.wallet, "side": event.side,
+        "sent_amount": event.sent_amount, "sent_mint": event.sent_mint,
+        "recv_amount": event.recv_amount, "recv_mint": event.recv_mint,
+        "aggregator": event.aggregator, "description": event.description,
+        "sent_symbol": event.sent_symbol, "recv_symbol": event.recv_symbol,
+    }
+
+
+def event_bytes(make, count: int) -> float:
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = [make(i) for i in range(count)]
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del kept
+    return size / count
+
+
+def main():
+    args = parse_args()
+    wallet = random_address()
+    docs = [enhanced(random.choice(KINDS), wallet, args.accounts) for _ in range(args.batch)]
+    body = json.dumps(docs).encode()
+    n = args.batch
+
+    print(f"decoder        msgspec {msgspec.__version__}")
+    print(f"body           {len(body) / n / 1024:.1f} KiB per tx, {n} txs per response")
+    print()
+    print(f"{'':<15}{'dicts':>12}{'typed':>12}")
+
+    dicts_cpu, typed_cpu = best_time(decode_dicts, body, args.rounds), best_time(decode_typed, body, args.rounds)
+    print(f"{'decode µs/tx':<15}{dicts_cpu / n * 1e6:>12.1f}{typed_cpu / n * 1e6:>12.1f}")
+
+    (dicts_kept, dicts_peak), (typed_kept, typed_peak) = memory(decode_dicts, body), memory(decode_typed, body)
+    print(f"{'retained B/tx':<15}{dicts_kept / n:>12.0f}{typed_kept / n:>12.0f}")
+    print(f"{'peak B/tx':<15}{dicts_peak / n:>12.0f}{typed_peak / n:>12.0f}")
+
+    # what a classifier process-pool batch ships per item
+    as_dicts, as_typed = decode_dicts(body), decode_typed(body)
+    dicts_pickle = len(pickle.dumps([(tx, wallet) for tx in as_dicts.values()])) / n
+    typed_pickle = len(pickle.dumps([(tx, wallet) for tx in as_typed.values()])) / n
+    print(f"{'pickle B/tx':<15}{dicts_pickle:>12.0f}{typed_pickle:>12.0f}")
+
+    sample = TxEvent(
+        "sig", wallet, "SWAP", 1.5, random_address(), "USDC", 0.25, random_address(), "SOL",
+        aggregator="Jupiter", description="swapped"
+    )
+    dicts_event = event_bytes(lambda i: event_dict(sample), 10_000)
+    typed_event = event_bytes(lambda i: TxEvent(
+        sample.signature, sample.wallet, sample.side, sample.sent_amount, sample.sent_mint, sample.sent_symbol,
+        sample.recv_amount, sample.recv_mint, sample.recv_symbol, aggregator=sample.aggregator,
+        description=sample.description
+    ), 10_000)
+    print(f"{'event B':<15}{dicts_event:>12.0f}{typed_event:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# loadtest/environment.py
+import os
+
+
+def configure_env(args, workdir: str):
+    # config.py reads the environment at import time, so this must run first
+    os.environ.update({
+        "TELEGRAM_BOT_TOKEN": "123456:LOADTEST",
+        "WHITELISTED_USER_IDS": ",".join(str(i) for i in range(1, args.users + 1)),
+        "WSS_SOLANA_RPC_URL": "ws://127.0.0.1",
+        "WSS_HELIUS_RPC_URL": "ws://127.0.0.1",
+        "HELIUS_API_KEY": "loadtest",
+        "DATABASE_PATH": f"sqlite+aiosqlite:///{workdir}/loadtest.db",
+        "INGEST_PATH": f"{workdir}/ingest.db",
+        "INGEST_MAX_DEPTH": str(args.ingest_depth),
+        "WALLET_RATE_CAP": str(args.rate_cap),
+        "FAST_MODE": "1" if args.fast else "0",
+        "DIGEST": "1" if args.digest else "0",
+        "DIGEST_WINDOW": str(args.digest or 60),
+        "CLASSIFIER_PROCESSES": str(args.classifier_processes),
+        "HELIUS_API_URL": f"http://127.0.0.1:{args.helius_port}",
+        "HELIUS_RPC_URL": f"http://127.0.0.1:{args.helius_port}",
+        "HELIUS_WS_URL": f"ws://127.0.0.1:{args.helius_port}",
+        "TELEGRAM_API_URL": f"http://127.0.0.1:{args.telegram_port}",
+    })
+    if not args.telegram_limits:
+        os.environ.setdefault("TELEGRAM_CHAT_INTERVAL", "0")
+        os.environ.setdefault("TELEGRAM_GLOBAL_RATE", "1000000")
+
+
+async def seed_database(wallets: list[str], users: int):
+    from config import TOKEN_SYMBOLS
+    from db.engine import AsyncSession
+    from db.models import User, Wallet, Token
+
+    async with AsyncSession() as session:
+        db_users = [User(telegram_id=i, enabled=True) for i in range(1, users + 1)]
+        session.add_all(db_users)
+        await session.flush()
+
+        for user in db_users:
+            for mint, symbol in TOKEN_SYMBOLS.items():
+                if len(mint) >= 32:
+                    session.add(Token(user_id=user.id, mint=mint, symbol="SOL" if symbol == "WSOL" else symbol, enabled=True))
+
+        for i, address in enumerate(wallets):
+            user = db_users[i % users]
+            session.add(Wallet(user_id=user.id, address=address, label=f"wallet-{i}", enabled=True))
+        await session.commit()
@@ -0,0 +1,207 @@
+# loadtest/fake_servers.py
+import asyncio
+import json
+import re
+import time
+from collections import Counter
+from itertools import count
+
+from aiohttp import web, WSMsgType
+
+SIGNATURE_RE = re.compile(r"solscan\.io/tx/(\w+)")
+
+
+class FakeHelius:
+    """Stand-in for Helius enhanced REST, JSON-RPC and logsSubscribe websocket."""
+
+    def __init__(self, index_lag: float = 0.0, latency: float = 0.0, capacity: int = 0):
+        self.index_lag = index_lag
+        self.latency = latency
+        self.capacity = capacity     # concurrent /v0/transactions calls before 429, 0 = unlimited
+        self.concurrent = 0
+        self.max_concurrent = 0
+        self.rejected = 0
+        self.transactions: dict[str, tuple[float, dict]] = {}   # signature -> (published_at, tx)
+        # wallet -> {ws: sub id}; more than one socket per wallet means two shards overlap
+        self.subscriptions: dict[str, dict[web.WebSocketResponse, int]] = {}
+        self.requests = 0
+        self._sub_ids = count(1)
+        self._slot = count(300_000_000)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/", self.websocket)
+        app.router.add_post("/", self.rpc)
+        app.router.add_post("/v0/transactions", self.transactions_handler)
+        app.router.add_post("/v0/transactions/", self.transactions_handler)
+        app.router.add_post("/v0/token-metadata", self.token_metadata)
+        return app
+
+    async def publish(self, wallet: str, tx: dict, logs: list[str]) -> bool:
+        """Make `tx` fetchable and push its logsNotification. False if nobody listens to `wallet`."""
+        subscribers = self.subscriptions.get(wallet)
+        if not subscribers:
+            return False
+
+        slot = next(self._slot)
+        tx.setdefault("slot", slot)
+        self.transactions[tx["signature"]] = (time.monotonic(), tx)
+        for ws, sub_id in list(subscribers.items()):
+            await ws.send_str(json.dumps({
+                "jsonrpc": "2.0",
+                "method": "logsNotification",
+                "params": {
+                    "result": {
+                        "context": {"slot": slot},
+                        "value": {"signature": tx["signature"], "err": None, "logs": logs}
+                    },
+                    "subscription": sub_id
+                }
+            }))
+        return True
+
+    async def websocket(self, request: web.Request):
+        ws = web.WebSocketResponse(autoping=True)
+        await ws.prepare(request)
+
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            data = json.loads(msg.data)
+            method, params = data.get("method"), data.get("params", [])
+
+            if method == "logsSubscribe":
+                sub_id = next(self._sub_ids)
+                self.subscriptions.setdefault(params[0]["mentions"][0], {})[ws] = sub_id
+                await ws.send_str(json.dumps({"jsonrpc": "2.0", "result": sub_id, "id": data["id"]}))
+            elif method == "logsUnsubscribe":
+                for wallet, subscribers in list(self.subscriptions.items()):
+                    if subscribers.get(ws) == params[0]:
+                        self._drop(wallet, ws)
+                await ws.send_str(json.dumps({"jsonrpc": "2.0", "result": True, "id": data["id"]}))
+
+        for wallet in list(self.subscriptions):
+            self._drop(wallet, ws)
+        return ws
+
+    def _drop(self, wallet: str, ws: web.WebSocketResponse):
+        subscribers = self.subscriptions.get(wallet, {})
+        subscribers.pop(ws, None)
+        if not subscribers:
+            self.subscriptions.pop(wallet, None)
+
+    async def rpc(self, request: web.Request):
+        data = await request.json()
+        # getSignaturesForAddress for backfill: nothing was missed
+        return web.json_response({"jsonrpc": "2.0", "result": [], "id": data.get("id")})
+
+    async def transactions_handler(self, request: web.Request):
+        self.requests += 1
+        if self.capacity and self.concurrent >= self.capacity:
+            self.rejected += 1
+            return web.json_response({"error": "rate limited"}, status=429)
+
+        self.concurrent += 1
+        self.max_concurrent = max(self.max_concurrent, self.concurrent)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            return await self._transactions(request)
+        finally:
+            self.concurrent -= 1
+
+    async def _transactions(self, request: web.Request):
+        body = await request.json()
+        now = time.monotonic()
+        result = []
+        for signature in body.get("transactions", []):
+            entry = self.transactions.get(signature)
+            # simulate the enhanced API indexing behind the websocket
+            if entry and now - entry[0] >= self.index_lag:
+                result.append(entry[1])
+        return web.json_response(result)
+
+    async def token_metadata(self, request: web.Request):
+        body = await request.json()
+        return web.json_response([
+            {"account": mint, "onChainMetadata": {"metadata": {"data": {"symbol": f"T{mint[:4]}"}}}}
+            for mint in body.get("mintAccounts", [])
+        ])
+
+
+class FakeTelegram:
+    """Stand-in for the Bot API: records when each signature's alert was delivered."""
+
+    def __init__(self):
+        self.delivered: dict[str, float] = {}
+        self.edited: dict[str, float] = {}         # signature -> last editMessageText
+        self.deliveries: Counter[str] = Counter()   # signature -> alerts sent for it
+        self.messages = 0
+        self.polls = 0
+        self.max_concurrent_polls = 0
+        self._message_ids = count(1)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        return app
+
+    async def handle(self, request: web.Request):
+        method = request.match_info["method"]
+        if method == "getMe":
+            return web.json_response({"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "loadtest", "username": "loadtest_bot"}})
+        if method == "deleteWebhook":
+            return web.json_response({"ok": True, "result": True})
+        if method == "getUpdates":
+            return await self.get_updates()
+
+        form = await request.post()
+        text = form.get("text", "")
+        chat_id = int(form.get("chat_id", 0))
+        self.messages += 1
+
+        match = SIGNATURE_RE.search(text)
+        if match:
+            self.delivered.setdefault(match.group(1), time.monotonic())
+            if method == "sendMessage":
+                self.deliveries[match.group(1)] += 1
+            elif method == "editMessageText":
+                self.edited[match.group(1)] = time.monotonic()
+
+        message_id = int(form.get("message_id", 0)) if method == "editMessageText" else next(self._message_ids)
+        return web.json_response({
+            "ok": True,
+            "result": {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": text
+            }
+        })
+
+
+    async def get_updates(self):
+        # a short long-poll with no updates; overlapping polls mean two pollers
+        self.polls += 1
+        self.max_concurrent_polls = max(self.max_concurrent_polls, self.polls)
+        try:
+            await asyncio.sleep(0.5)
+        finally:
+            self.polls -= 1
+        return web.json_response({"ok": True, "result": []})
+
+
+async def start_app(app: web.Application, port: int) -> web.AppRunner:
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+async def wait_for_subscriptions(helius: FakeHelius, wallets: list[str], timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if all(helius.subscriptions.get(w) for w in wallets):
+            return
+        await asyncio.sleep(0.05)
+    raise TimeoutError(f"only {len(helius.subscriptions)}/{len(wallets)} wallets subscribed")
@@ -0,0 +1,115 @@
+# loadtest/fixtures.py
+import random
+import string
+
+from config import TOKEN_SYMBOLS
+
+USDC = TOKEN_SYMBOLS["USDC"]
+WSOL = TOKEN_SYMBOLS["WSOL"]
+WET = TOKEN_SYMBOLS["WET"]
+
+JUPITER_PROGRAM = "JUP6LkbZbjS1jKKwapdHNy74zcZ3tLUZoi5QNyVTaV4"
+TOKEN_PROGRAM = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+SYSTEM_PROGRAM = "11111111111111111111111111111111"
+UNKNOWN_PROGRAM = "M2mx93ekt1fmXSVkTrUL9xVFHkmME8HTUi5Cyc5aF7K"
+
+# kinds that end up as a Telegram message
+NOTIFYING_KINDS = {"swap", "transfer", "unknown"}
+
+BASE58 = "".join(c for c in string.ascii_letters + string.digits if c not in "0OIl")
+
+
+def random_address(length: int = 44) -> str:
+    return "".join(random.choices(BASE58, k=length))
+
+
+def random_signature() -> str:
+    return random_address(88)
+
+
+def _invoke(program: str) -> list[str]:
+    return [f"Program {program} invoke [1]", f"Program {program} success"]
+
+
+def swap(signature: str, wallet: str) -> tuple[dict, list[str]]:
+    pool = random_address()
+    sent, recv = random.choice([(USDC, WSOL), (WSOL, USDC), (USDC, WET)])
+    tx = {
+        "signature": signature,
+        "type": "SWAP",
+        "source": "JUPITER",
+        "fee": 5000,
+        "description": f"{wallet} swapped {sent} for {recv}",
+        "tokenTransfers": [
+            {"fromUserAccount": wallet, "toUserAccount": pool, "mint": sent, "tokenAmount": round(random.uniform(1, 500), 6)},
+            {"fromUserAccount": pool, "toUserAccount": wallet, "mint": recv, "tokenAmount": round(random.uniform(0.01, 5), 9)},
+        ],
+        "nativeTransfers": [],
+    }
+    return tx, _invoke(JUPITER_PROGRAM) + _invoke(TOKEN_PROGRAM)
+
+
+def transfer(signature: str, wallet: str) -> tuple[dict, list[str]]:
+    to = random_address()
+    tx = {
+        "signature": signature,
+        "type": "TRANSFER",
+        "source": "SOLANA_PROGRAM_LIBRARY",
+        "fee": 5000,
+        "description": f"{wallet} transferred USDC to {to}.",
+        "tokenTransfers": [
+            {"fromUserAccount": wallet, "toUserAccount": to, "mint": USDC, "tokenAmount": round(random.uniform(1, 100), 6)},
+        ],
+        "nativeTransfers": [],
+    }
+    return tx, _invoke(TOKEN_PROGRAM)
+
+
+def spam(signature: str, wallet: str) -> tuple[dict, list[str]]:
+    sender = random_address()
+    tx = {
+        "signature": signature,
+        "type": "TRANSFER",
+        "source": "SYSTEM_PROGRAM",
+        "fee": 5000,
+        "description": f"{sender} transferred a total 0.00001 SOL to multiple accounts.",
+        "tokenTransfers": [
+            {"fromUserAccount": sender, "toUserAccount": wallet, "mint": WSOL, "tokenAmount": 0.000001},
+        ],
+        "nativeTransfers": [
+            {"fromUserAccount": sender, "toUserAccount": wallet, "amount": 1000},
+        ],
+    }
+    return tx, _invoke(SYSTEM_PROGRAM) * 8
+
+
+def unknown(signature: str, wallet: str) -> tuple[dict, list[str]]:
+    tx = {
+        "signature": signature,
+        "type": "NFT_SALE",
+        "source": "MAGIC_EDEN",
+        "fee": 5000,
+        "description": f"{wallet} sold an NFT.",
+        "tokenTransfers": [
+            {"fromUserAccount": wallet, "toUserAccount": random_address(), "mint": random_address(), "tokenAmount": 1},
+        ],
+        "nativeTransfers": [],
+    }
+    return tx, _invoke(UNKNOWN_PROGRAM)
+
+
+BUILDERS = {
+    "swap": swap,
+    "transfer": transfer,
+    "spam": spam,
+    "unknown": unknown,
+}
+
+
+def make_transaction(kind: str, wallet: str) -> tuple[dict, list[str]]:
+    """Build a Helius enhanced transaction plus the program logs its notification carries."""
+    return BUILDERS[kind](random_signature(), wallet)
+
+
+def pick_kind(mix: dict[str, float]) -> str:
+    return random.choices(list(mix), weights=list(mix.values()))[0]
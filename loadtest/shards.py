@@ -0,0 +1,176 @@
+# loadtest/shards.py
+#
+# Sharded mode on one machine: N real `main.py` processes share one SQLite
+# database and talk to the fake Helius / Telegram servers run by this process.
+#
+#   python -m loadtest.shards --nodes 3 --wallets 60
+#
+# Checks that every wallet is subscribed by exactly one node, every alert goes
+# out once, only one node polls getUpdates, and that the survivors take over the
+# wallets and the poller lease of a node that gets killed.
+import argparse
+import asyncio
+import os
+import signal
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+from loadtest.environment import configure_env, seed_database
+
+MAIN = str(Path(__file__).resolve().parent.parent / "main.py")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="SolTracker sharded mode check")
+    parser.add_argument("--nodes", type=int, default=3)
+    parser.add_argument("--wallets", type=int, default=60)
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--rate", type=float, default=50, help="transactions per second per phase")
+    parser.add_argument("--duration", type=float, default=5, help="seconds to replay per phase")
+    parser.add_argument("--drain", type=float, default=10)
+    parser.add_argument("--heartbeat", type=float, default=1.0, help="SHARD_HEARTBEAT_INTERVAL")
+    parser.add_argument("--lease-ttl", type=float, default=3.0, help="SHARD_LEASE_TTL")
+    parser.add_argument("--helius-port", type=int, default=18899)
+    parser.add_argument("--telegram-port", type=int, default=18898)
+    args = parser.parse_args()
+    # configure_env() knobs that don't apply here
+    args.telegram_limits, args.ingest_depth, args.rate_cap, args.fast, args.digest = False, 50_000, 0, False, 0
+    args.classifier_processes = 0
+    return args
+
+
+async def wait_until(predicate, timeout: float, what: str):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return time.monotonic()
+        await asyncio.sleep(0.1)
+    raise TimeoutError(what)
+
+
+async def current_poller() -> str | None:
+    from sqlalchemy import select
+    from db import AsyncSession, LeaderLease
+    from utils.sharding import POLLER_ROLE
+
+    async with AsyncSession() as session:
+        return await session.scalar(select(LeaderLease.node_id).where(LeaderLease.role == POLLER_ROLE))
+
+
+async def replay(args, helius, telegram, wallets: list[str]) -> tuple[int, int, int]:
+    """Publish for `duration` seconds, wait for delivery. Returns (expected, delivered, duplicated)."""
+    from loadtest.fixtures import NOTIFYING_KINDS, make_transaction, pick_kind
+
+    mix = {"swap": 0.5, "transfer": 0.25, "spam": 0.15, "unknown": 0.1}
+    expected = set()
+    started = time.monotonic()
+    sent = 0
+    while time.monotonic() - started < args.duration:
+        kind, wallet = pick_kind(mix), wallets[sent % len(wallets)]
+        tx, logs = make_transaction(kind, wallet)
+        if await helius.publish(wallet, tx, logs) and kind in NOTIFYING_KINDS:
+            expected.add(tx["signature"])
+        sent += 1
+        await asyncio.sleep(1 / args.rate)
+
+    try:
+        await wait_until(lambda: expected <= telegram.delivered.keys(), args.drain, "drain")
+    except TimeoutError:
+        pass
+    delivered = len(expected & telegram.delivered.keys())
+    duplicated = sum(1 for sig in expected if telegram.deliveries[sig] > 1)
+    return len(expected), delivered, duplicated
+
+
+async def run(args, workdir: str):
+    from db import init_db, engine
+    from loadtest.fake_servers import FakeHelius, FakeTelegram, start_app, wait_for_subscriptions
+    from loadtest.fixtures import random_address
+    from utils.sharding import HashRing
+
+    helius, telegram = FakeHelius(), FakeTelegram()
+    runners = [
+        await start_app(helius.app(), args.helius_port),
+        await start_app(telegram.app(), args.telegram_port),
+    ]
+
+    wallets = [random_address() for _ in range(args.wallets)]
+    await init_db()
+    await seed_database(wallets, args.users)
+
+    nodes: dict[str, asyncio.subprocess.Process] = {}
+    for i in range(1, args.nodes + 1):
+        node_id = f"node-{i}"
+        node_dir = Path(workdir) / node_id
+        node_dir.mkdir()
+        env = {**os.environ, "NODE_ID": node_id, "INGEST_PATH": str(node_dir / "ingest.db")}
+        with open(node_dir / "stdout.log", "wb") as log:
+            nodes[node_id] = await asyncio.create_subprocess_exec(
+                sys.executable, MAIN, cwd=node_dir, env=env, stdout=log, stderr=log
+            )
+    print(f"▶ started {args.nodes} nodes, logs in {workdir}/node-*/stdout.log")
+
+    def exclusive() -> bool:
+        return all(len(helius.subscriptions.get(w, {})) == 1 for w in wallets)
+
+    try:
+        await wait_for_subscriptions(helius, wallets, timeout=60)
+        await wait_until(exclusive, 30, "wallets subscribed by more than one node")
+        poller = await current_poller()
+        ring = HashRing(tuple(sorted(nodes)))
+        spread = Counter(ring.owner(w) for w in wallets)
+        print(f"  ring     {dict(sorted(spread.items()))}, poller={poller}")
+
+        expected, delivered, duplicated = await replay(args, helius, telegram, wallets)
+        print(f"  phase 1  delivered {delivered}/{expected}, duplicated {duplicated}")
+
+        # kill the poller without a graceful leave: its leases have to expire
+        killed_at = time.monotonic()
+        nodes.pop(poller).send_signal(signal.SIGKILL)
+        orphaned = [w for w in wallets if ring.owner(w) == poller]
+        print(f"✖ killed {poller}, {len(orphaned)} wallets orphaned")
+
+        await wait_until(lambda: not any(helius.subscriptions.get(w) for w in orphaned), 10, "killed node's sockets closing")
+        await wait_until(lambda: all(helius.subscriptions.get(w) for w in wallets), 60, "takeover")
+        await wait_until(exclusive, 30, "wallets subscribed by more than one node after takeover")
+        print(f"  takeover wallets {time.monotonic() - killed_at:.1f}s after the kill")
+
+        deadline = time.monotonic() + 60
+        new_poller = None
+        while time.monotonic() < deadline and new_poller in (None, poller):
+            new_poller = await current_poller()
+            await asyncio.sleep(0.2)
+        print(f"  takeover poller {new_poller} {time.monotonic() - killed_at:.1f}s after the kill")
+
+        expected, delivered, duplicated = await replay(args, helius, telegram, wallets)
+        print(f"  phase 2  delivered {delivered}/{expected}, duplicated {duplicated}")
+        print(f"  getUpdates max concurrent pollers: {telegram.max_concurrent_polls}")
+
+    finally:
+        for process in nodes.values():
+            if process.returncode is None:
+                process.terminate()
+        await asyncio.gather(*(p.wait() for p in nodes.values()))
+        await engine.dispose()
+        for runner in runners:
+            await runner.cleanup()
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_env(args, workdir)
+        os.environ.update({
+            "SHARDING": "1",
+            "SHARD_HEARTBEAT_INTERVAL": str(args.heartbeat),
+            "SHARD_LEASE_TTL": str(args.lease_ttl),
+            "METRICS_PORT": "0",
+        })
+        asyncio.run(run(args, workdir))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,43 @@
 # main.py
 import asyncio
-import httpx
-from workers import tx_worker
+import signal
+from os import getenv
+from workers import WorkerPool, notifier, retry_scheduler, overflow_summaries, digests
 from utils.log import setup_logger, logger
-from utils import WalletDispatcher
+from utils import WalletDispatcher, routing_index, shard
 from bot import dp, bot
-from db import init_db
-from solana_tracker import parse_transaction
+from db import init_db, engine
+from solana_tracker import token_cache, cursor_store, event_store, create_ingest_queue, HeliusClient
+from solana_tracker.classifier import start_executor, shutdown_executor
 from config import config
+from metrics import serve_metrics
+
+async def telegram_poller():
+    # signals are main()'s: it delivers what's still queued and closes the bot session itself
+    if not config.sharding:
+        await dp.start_polling(bot, handle_signals=False, close_bot_session=False)
+        return
+
+    # one getUpdates consumer per bot token: only the lease holder polls
+    while True:
+        await shard.wait_leader()
+        polling = asyncio.create_task(
+            dp.start_polling(bot, handle_signals=False, close_bot_session=False)
+        )
+        demoted = asyncio.create_task(shard.wait_follower())
+        await asyncio.wait({polling, demoted}, return_when=asyncio.FIRST_COMPLETED)
+        demoted.cancel()
+
+        if not polling.done():
+            try:
+                await dp.stop_polling()
+            except RuntimeError:
+                # lease lost before polling got going
+                polling.cancel()
+        result, = await asyncio.gather(polling, return_exceptions=True)
+        if isinstance(result, Exception):
+            logger.error(f"❌ Telegram polling stopped: {type(result).__name__} {result}")
+            await asyncio.sleep(config.shard_heartbeat_interval)
 
 async def main():
     setup_logger()
@@ -16,30 +46,74 @@ async def main():
     await init_db()
     logger.info("✅ Database initialized")
 
+    await routing_index.load()
+
+    if config.sharding:
+        if not getenv("NODE_ID") and config.ingest_backend == "sqlite":
+            logger.warning(f"⚠️ NODE_ID is not set: the ingest journal {config.ingest_path} won't be found again after a restart")
+        # join the ring before the first reconcile, or this node would grab every wallet
+        await shard.heartbeat()
+        logger.info(f"🧩 Node {shard.node_id}: {len(shard.nodes)} nodes in the ring")
 
-    queue = asyncio.Queue()
+    if config.metrics_port:
+        await serve_metrics(config.metrics_host, config.metrics_port)
 
-    limits = httpx.Limits(
-        max_connections=8,
-        max_keepalive_connections=2
-    )
+    queue = create_ingest_queue()
+    await start_executor()
 
-    timeout = httpx.Timeout(15.0)
+    # pooling, HTTP/2 and the adaptive concurrency limit for every Helius call
+    async with HeliusClient() as client:
+        await token_cache.start(client)
+        await cursor_store.load()
+        await event_store.load()
+        # after event_store: restored jobs that were already parsed must dedup as done
+        await queue.load()
 
-    async with httpx.AsyncClient(
-        limits=limits,
-        timeout=timeout,
-        http2=False
-    ) as client:
-        wallet_dispatcher = WalletDispatcher(queue)
+        wallet_dispatcher = WalletDispatcher(queue, client)
+        worker_pool = WorkerPool(queue, client)
 
         tasks = [
             asyncio.create_task(wallet_dispatcher.run()),   # 👈 ВАЖНО
-            asyncio.create_task(tx_worker(queue, client)),
-            asyncio.create_task(tx_worker(queue, client)),
-            asyncio.create_task(dp.start_polling(bot)),
+            asyncio.create_task(cursor_store.run()),
+            asyncio.create_task(event_store.run()),
+            asyncio.create_task(worker_pool.run()),
+            asyncio.create_task(notifier.run()),
+            asyncio.create_task(retry_scheduler.run(queue)),
+            asyncio.create_task(overflow_summaries()),
+            asyncio.create_task(shard.run()),
+            asyncio.create_task(telegram_poller()),
         ]
 
-        await asyncio.gather(*tasks)
+        # SIGINT already cancels main() (asyncio.run): stop the same way on SIGTERM
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            shutdown_executor()
+            if config.sharding:
+                # hand the wallets and the poller lease over now, not after the lease expires
+                try:
+                    await shard.leave()
+                    logger.info(f"👋 Node {shard.node_id} left the ring")
+                except Exception as e:
+                    logger.error(f"❌ Could not leave the ring: {type(e).__name__} {e}")
+            # their jobs are acked already: an open digest window is lost unless sent now
+            digests.flush_all()
+            await notifier.drain(config.shutdown_drain_timeout)
+            await bot.session.close()
+            # the last events, and the ingest acks waiting for them
+            try:
+                await event_store.flush()
+            except Exception as e:
+                logger.error(f"❌ Final event flush failed: {type(e).__name__} {e}")
+            # aiosqlite connections hold non-daemon threads: the process wouldn't exit
+            await engine.dispose()
+            logger.info("🛑 Bot stopped")
 
-asyncio.run(main())
\ No newline at end of file
+# classifier pool workers (forkserver) re-import this module: only the real entry point runs the bot
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        # SIGINT / SIGTERM: main() has already shut down
+        pass
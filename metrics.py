@@ -0,0 +1,209 @@
+# metrics.py
+#
+# Minimal Prometheus-style metrics: counters, gauges and histograms with labels,
+# rendered in the text exposition format and served on /metrics.
+from bisect import bisect_left
+from time import perf_counter
+from typing import Awaitable, Callable
+
+from aiohttp import web
+from loguru import logger
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class _Scalar(Metric):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple, float] = {}
+        self._function: Callable[[], float] | None = None
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the value lazily at scrape time (unlabelled metrics only)."""
+        self._function = function
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        if self._function:
+            return self._function()
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> list[str]:
+        if self._function:
+            return [f"{self.name} {self._function()}"]
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in self._values.items()]
+
+
+class Counter(_Scalar):
+    type = "counter"
+
+
+class Gauge(_Scalar):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, *args, buckets: tuple[float, ...] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: dict[tuple, list[int]] = {}
+        self._sums: dict[tuple, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            self._sums[key] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[key] += value
+
+    def samples(self) -> list[str]:
+        lines = []
+        for key, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            cumulative += counts[-1]
+            le = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {self._sums[key]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        # registering the same name twice returns the existing metric
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets=buckets))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = Registry()
+
+
+async def serve_metrics(host: str, port: int) -> web.AppRunner | None:
+    """Start the /metrics endpoint. A port that can't be bound is not fatal, the bot runs without it."""
+    async def handle(request: web.Request):
+        return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+    except OSError as e:
+        await runner.cleanup()
+        logger.warning(f"⚠️ Metrics disabled, can't listen on {host}:{port}: {e}")
+        return None
+    logger.info(f"📈 Metrics on http://{host}:{port}/metrics")
+    return runner
+
+
+# ---------- pipeline metrics shared across modules ----------
+ws_notifications = registry.counter(
+    "tracker_ws_notifications_total", "logsNotification messages received", ("wallet",)
+)
+helius_request_seconds = registry.histogram(
+    "tracker_helius_request_seconds", "Helius request latency", ("endpoint",)
+)
+helius_responses = registry.counter(
+    "tracker_helius_responses_total", "Helius responses by status code", ("endpoint", "status")
+)
+parse_outcomes = registry.counter(
+    "tracker_parse_outcomes_total", "Classified transactions by side", ("side",)
+)
+classifier_batches = registry.counter(
+    "tracker_classifier_batches_total", "Classified batches by where they ran", ("where",)
+)
+telegram_send_seconds = registry.histogram(
+    "tracker_telegram_send_seconds", "Telegram send_message latency"
+)
+telegram_errors = registry.counter(
+    "tracker_telegram_errors_total", "Failed Telegram sends by error type", ("error",)
+)
+end_to_end_seconds = registry.histogram(
+    "tracker_end_to_end_seconds", "From logsNotification receipt to send_message completion",
+    buckets=(0.1, 0.25, 0.5, 1, 2, 3, 5, 10, 20, 30, 60, 120, 300)
+)
+# fast mode splits the above: first = provisional alert, final = the edit with the full parse;
+# without fast mode every alert is both
+alert_latency_seconds = registry.histogram(
+    "tracker_alert_latency_seconds", "From logsNotification receipt to the first / final alert", ("stage",),
+    buckets=(0.1, 0.25, 0.5, 1, 2, 3, 5, 10, 20, 30, 60, 120, 300)
+)
+
+
+async def timed_helius_request(endpoint: str, request: Awaitable):
+    """Await an httpx request, recording its latency and status code."""
+    started = perf_counter()
+    try:
+        resp = await request
+    except Exception:
+        helius_responses.inc(endpoint=endpoint, status="error")
+        raise
+    finally:
+        helius_request_seconds.observe(perf_counter() - started, endpoint=endpoint)
+    helius_responses.inc(endpoint=endpoint, status=resp.status_code)
+    return resp
@@ -1,2 +1,10 @@
-from .listener import listen_wallet
-from .parser import parse_transaction
\ No newline at end of file
+from .listener import SubscriptionPool
+from .parser import parse_transaction, parse_transactions, fetch_transactions
+from .jobs import TxJob
+from .schema import EnhancedTransaction, TxEvent
+from .ingest import IngestQueue, SqliteIngestQueue, create_ingest_queue
+from .token_cache import token_cache
+from .helius import HeliusClient
+from .dedup import deduper
+from .cursors import cursor_store
+from .event_store import event_store
\ No newline at end of file
@@ -0,0 +1,214 @@
+# solana_tracker/classifier.py
+#
+# Pure SWAP / TRANSFER / SKIPPED classification of Helius enhanced transactions.
+# No I/O and no logging here: records carry mints, symbols are resolved later in
+# one bulk step (see parser.resolve_symbols), and batches can run in a process pool.
+import asyncio
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from config import config, TOKEN_SYMBOLS, AGGREGATORS
+from metrics import classifier_batches
+from .schema import EnhancedTransaction, TxEvent
+
+SOL_MINT = TOKEN_SYMBOLS["SOL"]
+LAMPORTS_PER_SOL = 1_000_000_000
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def dropped(signature: str, wallet: str, reason: str) -> TxEvent:
+    return TxEvent(signature, wallet, "DROPPED", reason=reason)
+
+
+def classify(tx: EnhancedTransaction, wallet: str) -> TxEvent:
+    signature = tx.signature
+    tx_type = tx.type
+    source = tx.source
+    fee = tx.fee or 0
+    token_transfers = tx.token_transfers
+
+    if tx_type == "UNKNOWN":
+        tx_type = "SWAP"
+    if fee > 8000 and (tx_type == "TRANSFER" or source == "SYSTEM_PROGRAM"):
+        tx_type = "SWAP"
+        source = "JUPITER"
+
+    sent_mint, sent_amount = None, 0
+    if token_transfers:
+        sent_mint = token_transfers[0].mint
+        sent_amount = token_transfers[0].token_amount
+
+    # ---------- TRANSFER ----------
+    if tx_type == "TRANSFER" and fee < 8000:  # excluding SOL transfers which have 10000 lamports fee
+        if "to multiple accounts" in (tx.description or ""):
+            return dropped(signature, wallet, "spam transfer to multiple accounts")
+
+        if token_transfers:
+            t = token_transfers[0]
+            if t.token_amount > 0:
+                return TxEvent(
+                    signature, wallet, "TRANSFER",
+                    sent_amount=sent_amount,
+                    sent_mint=sent_mint,
+                    to_address=t.to_user_account,
+                    description=tx.description
+                )
+
+        # plain SOL transfer: no token transfer at all, the amount is in lamports
+        if tx.native_transfers:
+            t = tx.native_transfers[0]
+            if t.amount > 100:
+                return TxEvent(
+                    signature, wallet, "TRANSFER",
+                    sent_amount=t.amount / LAMPORTS_PER_SOL,
+                    sent_symbol="SOL",
+                    to_address=t.to_user_account,
+                    description=tx.description
+                )
+
+        return dropped(signature, wallet, "empty transfer")
+
+    # ---------- SWAP (including Jupiter UNKNOWN) ----------
+    if tx_type == "SWAP":
+        balance_changes = defaultdict(float)
+
+        # SPL token transfers
+        for t in token_transfers:
+            mint = t.mint
+            amount = t.token_amount
+
+            if t.from_user_account == wallet:
+                balance_changes[mint] -= amount
+
+            if t.to_user_account == wallet:
+                balance_changes[mint] += amount
+        if not balance_changes:
+            return dropped(signature, wallet, "no balance changes")
+
+        # -- SOL (native) delta for aggregator such as Wintermute Bot --
+        if SOL_MINT not in balance_changes and len(balance_changes) < 2:
+            balance_changes[SOL_MINT] = 0
+
+            # SOL delta calculation
+            sol_delta = 0.0
+            for t in tx.native_transfers:
+                if t.from_user_account == wallet:
+                    sol_delta -= t.amount / LAMPORTS_PER_SOL
+                if t.to_user_account == wallet:
+                    sol_delta += t.amount / LAMPORTS_PER_SOL
+
+            if abs(sol_delta) > 1e-6:
+                balance_changes[SOL_MINT] += sol_delta
+
+        # This swap token to token and not recieve for signer
+        if SOL_MINT in balance_changes and balance_changes[SOL_MINT] == 0:
+            balance_changes.clear()
+
+            first = token_transfers[0]
+            balance_changes[first.mint] = -first.token_amount
+
+            if first.from_user_account == wallet:
+                to_user_reciever = first.to_user_account.lower()
+                for t in token_transfers[1:]:
+                    if t.to_user_account.lower() == to_user_reciever:
+                        balance_changes[t.mint] = t.token_amount
+            else:
+                from_user_reciever = first.from_user_account.lower()
+                for t in token_transfers[1:]:
+                    if from_user_reciever == t.from_user_account.lower() and wallet.lower() == t.to_user_account.lower():
+                        balance_changes[t.mint] = t.token_amount
+
+        # Filter zero / dust
+        balance_changes = {
+            mint: amt for mint, amt in balance_changes.items()
+            if abs(amt) > 1e-9
+        }
+
+        if not balance_changes:
+            return dropped(signature, wallet, "dust-only balance changes")
+
+        # SENT = biggest negative
+        sent_mint, sent_amount = min(balance_changes.items(), key=lambda x: x[1])
+
+        # RECEIVED = biggest positive
+        recv_mint, recv_amount = max(balance_changes.items(), key=lambda x: x[1])
+
+        if sent_amount < 0 and recv_amount > 0:
+            return TxEvent(
+                signature, wallet, "SWAP",
+                sent_amount=abs(sent_amount),
+                sent_mint=sent_mint,
+                recv_amount=recv_amount,
+                recv_mint=recv_mint,
+                aggregator=AGGREGATORS.get(source, source),
+                description=tx.description
+            )
+        # could not determine swap direction: report it as skipped
+
+    # ---------- OTHER ----------
+    if not token_transfers:
+        # nothing to describe the tx with (NFT and program calls): not worth a SKIPPED alert
+        return dropped(signature, wallet, "no token transfers")
+    return TxEvent(
+        signature, wallet, "SKIPPED",
+        sent_amount=sent_amount,
+        sent_mint=sent_mint,
+        tx_type=tx_type,
+        source=source,
+        description=tx.description
+    )
+
+
+def classify_batch(items: list[tuple[EnhancedTransaction, str]]) -> list[TxEvent]:
+    """Classify (transaction, wallet) pairs. Never raises: bad input becomes a DROPPED record."""
+    events = []
+    for tx, wallet in items:
+        try:
+            events.append(classify(tx, wallet))
+        except (KeyError, IndexError, TypeError, ValueError, AttributeError) as e:
+            events.append(dropped(tx.signature, wallet, f"malformed tx: {type(e).__name__} {e}"))
+    return events
+
+
+def get_executor() -> ProcessPoolExecutor | None:
+    global _executor
+    if config.classifier_processes > 0 and _executor is None:
+        # not fork: this process already runs threads (aiosqlite, the log writer)
+        _executor = ProcessPoolExecutor(
+            max_workers=config.classifier_processes,
+            mp_context=multiprocessing.get_context("forkserver")
+        )
+    return _executor
+
+
+async def start_executor():
+    """Spawn the pool processes now instead of on the first large batch."""
+    executor = get_executor()
+    if executor is None:
+        return
+    loop = asyncio.get_running_loop()
+    # one job per process: the pool starts a new one only when none is idle
+    await asyncio.gather(*(
+        loop.run_in_executor(executor, classify_batch, []) for _ in range(config.classifier_processes)
+    ))
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+
+
+async def classify_async(items: list[tuple[EnhancedTransaction, str]]) -> list[TxEvent]:
+    """Small batches run inline; large ones (backfills, bursts) go to the process pool if enabled."""
+    executor = get_executor()
+    if executor is None or len(items) < config.classifier_pool_threshold:
+        classifier_batches.inc(where="inline")
+        return classify_batch(items)
+
+    classifier_batches.inc(where="pool")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, classify_batch, items)
@@ -0,0 +1,103 @@
+# solana_tracker/cursors.py
+import asyncio
+import time
+from dataclasses import dataclass
+
+from loguru import logger
+from sqlalchemy import delete, select
+
+from config import config
+from db.engine import AsyncSession
+from db.models import WalletCursor
+
+
+@dataclass(slots=True)
+class Cursor:
+    signature: str
+    slot: int
+
+
+class CursorStore:
+    """Last seen (signature, slot) per wallet, flushed to `wallet_cursors` in the background."""
+
+    def __init__(self):
+        self._cursors: dict[str, Cursor] = {}
+        self._dirty: set[str] = set()
+        self._forgotten: set[str] = set()
+
+    def get(self, address: str) -> Cursor | None:
+        return self._cursors.get(address)
+
+    def update(self, address: str, signature: str, slot: int):
+        current = self._cursors.get(address)
+        if current and current.slot > slot:
+            return
+        self._cursors[address] = Cursor(signature, slot)
+        self._dirty.add(address)
+        self._forgotten.discard(address)
+
+    def forget(self, address: str):
+        # wallet disabled: don't backfill what happened while nobody was listening
+        if self._cursors.pop(address, None):
+            self._dirty.discard(address)
+            self._forgotten.add(address)
+
+    async def load(self, addresses: set[str] | None = None):
+        query = select(WalletCursor)
+        if addresses is not None:
+            query = query.where(WalletCursor.address.in_(addresses))
+
+        async with AsyncSession() as session:
+            rows = (await session.execute(query)).scalars().all()
+
+        if addresses is None:
+            self._cursors = {row.address: Cursor(row.signature, row.slot) for row in rows}
+            logger.info(f"📍 Loaded cursors for {len(self._cursors)} wallets")
+            return
+
+        # wallets taken over from another shard: its cursor is the newer one
+        for row in rows:
+            current = self._cursors.get(row.address)
+            if current is None or current.slot <= row.slot:
+                self._cursors[row.address] = Cursor(row.signature, row.slot)
+
+    async def flush(self):
+        if not self._dirty and not self._forgotten:
+            return
+
+        dirty, self._dirty = self._dirty, set()
+        forgotten, self._forgotten = self._forgotten, set()
+        now = time.time()
+
+        try:
+            async with AsyncSession() as session:
+                for address in dirty:
+                    cursor = self._cursors.get(address)
+                    if cursor:
+                        await session.merge(WalletCursor(
+                            address=address,
+                            signature=cursor.signature,
+                            slot=cursor.slot,
+                            updated_at=now
+                        ))
+                if forgotten:
+                    await session.execute(
+                        delete(WalletCursor).where(WalletCursor.address.in_(forgotten))
+                    )
+                await session.commit()
+        except Exception:
+            # keep them for the next flush
+            self._dirty |= dirty
+            self._forgotten |= forgotten
+            raise
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(config.cursor_flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"❌ Cursor flush failed: {type(e).__name__} {e}")
+
+
+cursor_store = CursorStore()
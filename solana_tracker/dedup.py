@@ -0,0 +1,135 @@
+# solana_tracker/dedup.py
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from config import config
+from metrics import registry
+
+
+@dataclass(slots=True)
+class SeenSignature:
+    seen_at: float
+    pending: set[str] = field(default_factory=set)   # wallets waiting for the fetch
+    done: set[str] = field(default_factory=set)      # wallets already fanned out
+
+
+class SignatureDeduper:
+    """Bounded, time-windowed seen-set of signatures.
+
+    Every (signature, wallet) pair goes through `offer`; only the first one for a
+    signature becomes a queue item, later wallets are merged into it and handed
+    back together by `claim` once the transaction has been fetched.
+    """
+
+    def __init__(self, max_size: int = config.dedup_max_size, window: int = config.dedup_window):
+        self.max_size = max_size
+        self.window = window
+        self._seen: OrderedDict[str, SeenSignature] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def _expire(self, now: float):
+        cutoff = now - self.window
+        while self._seen:
+            entry = next(iter(self._seen.values()))
+            if entry.seen_at >= cutoff:
+                break
+            self._seen.popitem(last=False)
+            self.expired += 1
+
+    def offer(self, signature: str, wallet: str) -> bool:
+        """Record the pair. Returns True when it needs a new queue item."""
+        now = time.monotonic()
+        self._expire(now)
+
+        entry = self._seen.get(signature)
+        if entry is None:
+            self._seen[signature] = SeenSignature(seen_at=now, pending={wallet})
+            self.misses += 1
+            if len(self._seen) > self.max_size:
+                self._seen.popitem(last=False)
+                self.evictions += 1
+            return True
+
+        self.hits += 1
+        if wallet in entry.pending or wallet in entry.done:
+            # replay after reconnect or a second notification for the same wallet
+            return False
+
+        entry.pending.add(wallet)
+        # if the signature was already fetched, this wallet needs its own pass
+        return bool(entry.done)
+
+    def seed(self, handled: Iterable[tuple[str, str, float]]):
+        """Mark (signature, wallet, handled_at) triples as handled, before a restart or by
+        another shard. `handled_at` is wall-clock time; pairs already outside the window are skipped."""
+        now, wall_now = time.monotonic(), time.time()
+        self._expire(now)
+        cutoff = now - self.window
+
+        # _expire only looks at the head: entries must stay in seen_at order
+        last = next(reversed(self._seen.values())).seen_at if self._seen else cutoff
+        in_order = True
+        for signature, wallet, handled_at in handled:
+            seen_at = now - max(0.0, wall_now - handled_at)
+            if seen_at < cutoff:
+                continue
+            entry = self._seen.get(signature)
+            if entry is None:
+                entry = self._seen[signature] = SeenSignature(seen_at=seen_at)
+                in_order = in_order and seen_at >= last
+                last = seen_at
+            entry.done.add(wallet)
+
+        if not in_order:
+            # a rebalance seeds entries older than what this node saw live
+            self._seen = OrderedDict(sorted(self._seen.items(), key=lambda item: item[1].seen_at))
+        while len(self._seen) > self.max_size:
+            self._seen.popitem(last=False)
+            self.evictions += 1
+
+    def claim(self, signature: str, wallet: str) -> set[str]:
+        """Take every wallet waiting on `signature` and mark them done."""
+        entry = self._seen.get(signature)
+        if entry is None:
+            # evicted while queued: still serve the wallet that queued it
+            return {wallet}
+
+        wallets, entry.pending = entry.pending, set()
+        if wallet not in entry.done:
+            # the entry may have expired and been re-created by another wallet's
+            # offer while this job was queued: the claiming wallet is always owed
+            wallets.add(wallet)
+        entry.done |= wallets
+        return wallets
+
+    def release(self, signature: str, wallets: set[str]):
+        """Undo a `claim` whose fan-out failed, so the retried job serves these wallets again."""
+        entry = self._seen.get(signature)
+        if entry is None:
+            return
+        entry.done -= wallets
+        entry.pending |= wallets
+
+    def forget(self, signature: str):
+        """The queue item for `signature` was shed: its pending wallets may be offered again."""
+        entry = self._seen.get(signature)
+        if entry is None:
+            return
+        entry.pending.clear()
+        if not entry.done:
+            del self._seen[signature]
+
+
+deduper = SignatureDeduper()
+registry.counter("tracker_dedup_hits_total", "Duplicate (signature, wallet) offers").set_function(lambda: deduper.hits)
+registry.counter("tracker_dedup_misses_total", "First sightings of a signature").set_function(lambda: deduper.misses)
+registry.counter("tracker_dedup_evictions_total", "Signatures evicted by the size cap").set_function(lambda: deduper.evictions)
+registry.counter("tracker_dedup_expired_total", "Signatures expired from the window").set_function(lambda: deduper.expired)
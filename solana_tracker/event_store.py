@@ -0,0 +1,210 @@
+# solana_tracker/event_store.py
+import asyncio
+import time
+from collections import deque
+from typing import Callable
+
+from loguru import logger
+from sqlalchemy import delete, func, or_, select
+
+from config import config
+from db.engine import AsyncSession, insert_ignore
+from db.models import TransactionEvent
+from metrics import registry
+from .dedup import deduper
+from .schema import TxEvent
+
+# a failing database must not turn the buffer into a memory leak
+MAX_BUFFERED_BATCHES = 20
+
+
+class EventStore:
+    """Parsed transactions, buffered in memory and bulk-inserted into `transaction_events`.
+
+    `record` is called from tx_worker and never touches the database; `run` flushes
+    every `event_flush_interval` seconds (or as soon as a full batch is waiting) and
+    prunes rows past `event_retention_days` / `event_max_rows` once in a while.
+    `after_flush` lets tx_worker ack its jobs only once their events are written.
+    """
+
+    def __init__(self):
+        self._buffer: list[dict] = []
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._head = 0        # rows ever taken off the buffer: written, being written or dropped
+        self._in_flight = 0
+        self._waiting: deque[tuple[int, Callable[[], None]]] = deque()   # (rows that must be done, callback)
+        self.written = 0
+        self.dropped = 0
+        self.pruned = 0
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def record(self, event: TxEvent):
+        if event.side not in ("SWAP", "TRANSFER", "SKIPPED"):
+            return
+
+        self._buffer.append({
+            "signature": event.signature,
+            "wallet": event.wallet,
+            "side": event.side,
+            "sent_mint": event.sent_mint,
+            "sent_amount": event.sent_amount,
+            "recv_mint": event.recv_mint,
+            "recv_amount": event.recv_amount,
+            "description": event.description,
+            "created_at": time.time(),
+        })
+
+        self._trim()
+        if len(self._buffer) >= config.event_batch_size:
+            self._wakeup.set()
+
+    def after_flush(self, callback: Callable[[], None]):
+        """Call `callback` once every event recorded so far is written (or dropped)."""
+        upto = self._head + len(self._buffer)
+        if upto <= self._head - self._in_flight:
+            callback()
+        else:
+            self._waiting.append((upto, callback))
+
+    def _settle(self):
+        done = self._head - self._in_flight
+        while self._waiting and self._waiting[0][0] <= done:
+            _, callback = self._waiting.popleft()
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"❌ after_flush callback: {type(e).__name__} {e}")
+
+    def _trim(self):
+        overflow = len(self._buffer) - config.event_batch_size * MAX_BUFFERED_BATCHES
+        if overflow > 0:
+            del self._buffer[:overflow]
+            self._head += overflow
+            self.dropped += overflow
+            logger.warning(f"⚠️ Event buffer full, dropped {overflow} oldest events")
+            self._settle()
+
+    async def flush(self):
+        async with self._lock:
+            while self._buffer:
+                # taken out before the write: record() may trim the buffer's head meanwhile
+                batch = self._buffer[:config.event_batch_size]
+                del self._buffer[:len(batch)]
+                self._head += len(batch)
+                self._in_flight = len(batch)
+                try:
+                    async with AsyncSession() as session:
+                        await session.execute(insert_ignore(TransactionEvent), batch)
+                        await session.commit()
+                except BaseException:
+                    # not written: back in front of whatever arrived meanwhile
+                    self._buffer[:0] = batch
+                    self._head -= len(batch)
+                    self._in_flight = 0
+                    self._trim()
+                    raise
+                self._in_flight = 0
+                self.written += len(batch)
+                self._settle()
+
+    async def prune(self):
+        cutoff = time.time() - config.event_retention_days * 86400
+        async with AsyncSession() as session:
+            result = await session.execute(
+                delete(TransactionEvent).where(TransactionEvent.created_at < cutoff)
+            )
+            removed = result.rowcount or 0
+
+            if config.event_max_rows:
+                # timestamp of the newest row that no longer fits under the cap
+                boundary = (
+                    select(TransactionEvent.created_at)
+                    .order_by(TransactionEvent.created_at.desc())
+                    .offset(config.event_max_rows)
+                    .limit(1)
+                    .scalar_subquery()
+                )
+                result = await session.execute(
+                    delete(TransactionEvent).where(TransactionEvent.created_at <= boundary)
+                )
+                removed += result.rowcount or 0
+
+            await session.commit()
+
+        self.pruned += removed
+        if removed:
+            logger.info(f"🧹 Pruned {removed} old transaction events")
+
+    async def load(self, wallets: set[str] | None = None):
+        """Re-seed the deduper with what was already handled inside its window
+        (by this process before a restart, or by another shard for `wallets`)."""
+        cutoff = time.time() - deduper.window
+        query = (
+            select(TransactionEvent.signature, TransactionEvent.wallet, TransactionEvent.created_at)
+            .where(TransactionEvent.created_at >= cutoff)
+            .order_by(TransactionEvent.created_at)
+        )
+        if wallets is not None:
+            query = query.where(TransactionEvent.wallet.in_(wallets))
+
+        async with AsyncSession() as session:
+            rows = (await session.execute(query)).all()
+
+        deduper.seed(rows)
+        logger.info(f"🗃 Seeded deduper with {len(rows)} recent events")
+
+    async def history(
+        self,
+        wallet: str | None = None,
+        mint: str | None = None,
+        since: float | None = None,
+        limit: int = 50
+    ) -> list[TransactionEvent]:
+        query = select(TransactionEvent)
+        if wallet:
+            query = query.where(TransactionEvent.wallet == wallet)
+        if mint:
+            query = query.where(or_(TransactionEvent.sent_mint == mint, TransactionEvent.recv_mint == mint))
+        if since:
+            query = query.where(TransactionEvent.created_at >= since)
+
+        async with AsyncSession() as session:
+            return (await session.execute(
+                query.order_by(TransactionEvent.created_at.desc()).limit(limit)
+            )).scalars().all()
+
+    async def count(self) -> int:
+        async with AsyncSession() as session:
+            return (await session.execute(select(func.count()).select_from(TransactionEvent))).scalar_one()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        next_prune = loop.time()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=config.event_flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"❌ Event flush failed ({len(self._buffer)} buffered): {type(e).__name__} {e}")
+
+            if loop.time() >= next_prune:
+                next_prune = loop.time() + config.event_prune_interval
+                try:
+                    await self.prune()
+                except Exception as e:
+                    logger.error(f"❌ Event pruning failed: {type(e).__name__} {e}")
+
+
+event_store = EventStore()
+registry.gauge("tracker_event_buffer", "Parsed events waiting for the next bulk insert").set_function(lambda: len(event_store))
+registry.counter("tracker_events_written_total", "Parsed events stored").set_function(lambda: event_store.written)
+registry.counter("tracker_events_dropped_total", "Parsed events dropped on buffer overflow").set_function(lambda: event_store.dropped)
+registry.counter("tracker_events_pruned_total", "Parsed events removed by retention").set_function(lambda: event_store.pruned)
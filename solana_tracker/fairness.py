@@ -0,0 +1,156 @@
+# solana_tracker/fairness.py
+#
+# Per-wallet fairness for the ingest path:
+#   FairQueue      per-wallet FIFOs served by deficit round robin, so a wallet
+#                  doing hundreds of tx/min can't push quiet wallets minutes back
+#   WalletRateCap  at most `rate_cap` live notifications per wallet per window;
+#                  the rest are only counted and sent as one summary
+# Both read WalletPolicy (weight, rate cap), which utils.routing keeps in sync
+# with the `wallets` table.
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from config import config
+from metrics import registry
+from .jobs import TxJob
+
+rate_capped = registry.counter("tracker_wallet_rate_capped_total", "Notifications coalesced by the per-wallet rate cap")
+
+
+@dataclass(slots=True, frozen=True)
+class WalletPolicy:
+    weight: int = 1        # DRR quantum: jobs served per round
+    rate_cap: int = 0      # notifications per `wallet_rate_window`, 0 = unlimited
+
+
+DEFAULT_POLICY = WalletPolicy(rate_cap=config.wallet_rate_cap)
+
+
+class WalletPolicies:
+    def __init__(self):
+        self._policies: dict[str, WalletPolicy] = {}
+
+    def get(self, address: str) -> WalletPolicy:
+        return self._policies.get(address, DEFAULT_POLICY)
+
+    def set(self, address: str, policy: WalletPolicy):
+        self._policies[address] = policy
+
+    def discard(self, address: str):
+        self._policies.pop(address, None)
+
+
+wallet_policies = WalletPolicies()
+
+
+class FairQueue:
+    """Jobs of one priority class, bucketed by wallet and served by deficit round robin."""
+
+    def __init__(self):
+        self._queues: dict[str, deque[TxJob]] = {}
+        self._active: deque[str] = deque()     # wallets with queued jobs, in service order
+        self._deficit: dict[str, int] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def append(self, job: TxJob):
+        queue = self._queues.get(job.wallet)
+        if queue is None:
+            queue = self._queues[job.wallet] = deque()
+            self._active.append(job.wallet)
+            self._deficit[job.wallet] = 0
+        queue.append(job)
+        self._size += 1
+
+    def popleft(self) -> TxJob:
+        if not self._size:
+            raise IndexError("pop from an empty FairQueue")
+
+        wallet = self._active[0]
+        if self._deficit[wallet] <= 0:
+            # new turn for this wallet
+            self._deficit[wallet] += max(1, wallet_policies.get(wallet).weight)
+
+        queue = self._queues[wallet]
+        job = queue.popleft()
+        self._size -= 1
+        self._deficit[wallet] -= 1
+
+        if not queue:
+            self._forget(wallet)
+        elif self._deficit[wallet] <= 0:
+            self._active.rotate(-1)
+        return job
+
+    def pop_newest(self) -> TxJob:
+        """Evict from the wallet with the longest backlog: shedding is fair as well."""
+        wallet = max(self._queues, key=lambda w: len(self._queues[w]))
+        queue = self._queues[wallet]
+        job = queue.pop()
+        self._size -= 1
+        if not queue:
+            self._forget(wallet)
+        return job
+
+    def _forget(self, wallet: str):
+        del self._queues[wallet]
+        del self._deficit[wallet]
+        self._active.remove(wallet)
+
+    def backlog(self) -> dict[str, int]:
+        return {wallet: len(queue) for wallet, queue in self._queues.items()}
+
+
+@dataclass(slots=True)
+class Overflow:
+    count: int = 0
+    last_signature: str = ""
+    first_at: float = field(default_factory=time.time)
+
+
+class WalletRateCap:
+    """Sliding-window cap on live notifications per wallet."""
+
+    def __init__(self, window: float = config.wallet_rate_window):
+        self.window = window
+        self._seen: dict[str, deque[float]] = {}
+        self._overflow: dict[str, Overflow] = {}
+
+    def allow(self, wallet: str, signature: str) -> bool:
+        cap = wallet_policies.get(wallet).rate_cap
+        if not cap:
+            return True
+
+        now = time.monotonic()
+        seen = self._seen.setdefault(wallet, deque())
+        while seen and seen[0] <= now - self.window:
+            seen.popleft()
+        if len(seen) < cap:
+            seen.append(now)
+            return True
+
+        overflow = self._overflow.get(wallet)
+        if overflow is None:
+            overflow = self._overflow[wallet] = Overflow()
+        overflow.count += 1
+        overflow.last_signature = signature
+        rate_capped.inc()
+        return False
+
+    def drain(self) -> dict[str, Overflow]:
+        """Overflow collected since the last call, per wallet."""
+        overflow, self._overflow = self._overflow, {}
+        # idle wallets don't need their timestamps any more
+        cutoff = time.monotonic() - self.window
+        for wallet in [w for w, seen in self._seen.items() if not seen or seen[-1] <= cutoff]:
+            del self._seen[wallet]
+        return overflow
+
+
+rate_cap = WalletRateCap()
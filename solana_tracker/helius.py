@@ -0,0 +1,176 @@
+# solana_tracker/helius.py
+#
+# The one HTTP client for everything Helius (enhanced transactions, token
+# metadata, JSON-RPC). It owns
+#   - the connection pool, HTTP/2 if HELIUS_HTTP2=1 and `h2` is installed
+#   - an AIMD concurrency limit: +1 after a window of healthy responses,
+#     halved on 429 / 5xx / transport errors (at most once per round trip)
+#   - single-flight coalescing: identical requests in flight share one response
+import asyncio
+import json
+import time
+from collections import deque
+
+import httpx
+from loguru import logger
+
+from config import config
+from metrics import registry, timed_helius_request
+
+RTT_ALPHA = 0.2
+
+coalesced_requests = registry.counter(
+    "tracker_helius_coalesced_total", "Helius requests answered by an identical one already in flight", ("endpoint",)
+)
+limit_decreases = registry.counter(
+    "tracker_helius_limit_decreases_total", "Times the adaptive Helius concurrency limit backed off"
+)
+
+
+def h2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class AdaptiveLimit:
+    """AIMD concurrency limit, the TCP congestion-window idea applied to requests."""
+
+    def __init__(self, initial: int, minimum: int, maximum: int, backoff: float = 0.5,
+                 slow_latency: float = config.autoscale_max_helius_latency):
+        self.min = minimum
+        self.max = maximum
+        self.limit = float(max(minimum, min(maximum, initial)))
+        self.backoff = backoff
+        self.slow_latency = slow_latency
+        self.in_flight = 0
+        self._healthy = 0
+        self._hold_until = 0.0
+        self.rtt = 0.0   # smoothed latency of successful requests
+        self._waiters: deque[asyncio.Future] = deque()
+
+    async def acquire(self):
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # granted a slot, then cancelled before using it
+                self.release()
+            raise
+
+    def release(self, overloaded: bool = False, latency: float | None = None):
+        """`latency` None: the slot was given back unused, no signal either way."""
+        self.in_flight -= 1
+        if overloaded:
+            self._decrease()
+        if overloaded or latency is None:
+            return self._wake()
+
+        self.rtt += RTT_ALPHA * (latency - self.rtt)
+        if latency < self.slow_latency:
+            # slow but successful responses neither grow nor shrink the limit
+            self._healthy += 1
+            if self._healthy >= int(self.limit):
+                self._healthy = 0
+                self.limit = min(self.max, self.limit + 1)
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            future = self._waiters.popleft()
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+    def _decrease(self):
+        now = time.monotonic()
+        if now < self._hold_until:
+            return
+        # responses to requests sent before the cut still arrive for about one round trip
+        self._hold_until = now + self.rtt
+        self._healthy = 0
+        previous, self.limit = self.limit, max(self.min, self.limit * self.backoff)
+        limit_decreases.inc()
+        logger.warning(f"🐢 Helius overloaded, concurrency {previous:.0f} -> {self.limit:.0f}")
+
+
+class HeliusClient:
+    def __init__(self, http2: bool = config.helius_http2):
+        if http2 and not h2_available():
+            logger.warning("HELIUS_HTTP2=1 but the `h2` package is missing, staying on HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self.limit = AdaptiveLimit(config.helius_concurrency, config.helius_min_concurrency, config.helius_max_concurrency)
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=config.http_max_connections,
+                max_keepalive_connections=config.http_max_keepalive
+            ),
+            timeout=httpx.Timeout(15.0),
+            http2=http2
+        )
+        self._inflight: dict[str, list] = {}   # request key -> [task, callers waiting on it]
+        registry.gauge("tracker_helius_concurrency_limit", "Adaptive Helius concurrency limit").set_function(lambda: self.limit.limit)
+        registry.gauge("tracker_helius_in_flight", "Helius requests in flight").set_function(lambda: self.limit.in_flight)
+
+    async def __aenter__(self) -> "HeliusClient":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def post(self, endpoint: str, url: str, *, params: dict | None = None, json_body=None) -> httpx.Response:
+        """POST through the limiter; `endpoint` labels the metrics."""
+        key = f"{url}?{sorted((params or {}).items())}|{json.dumps(json_body, sort_keys=True)}"
+        shared = self._inflight.get(key)
+        if shared is None:
+            # its own task: a caller that gets cancelled doesn't take the others down with it
+            task = asyncio.create_task(self._send(endpoint, url, params, json_body))
+            shared = self._inflight[key] = [task, 0]
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            coalesced_requests.inc(endpoint=endpoint)
+
+        task = shared[0]
+        shared[1] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and shared[1] == 1:
+                # the last caller gave up: nobody wants the response any more
+                task.cancel()
+            raise
+        finally:
+            shared[1] -= 1
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key, [None])[0] is task:
+            del self._inflight[key]
+        # nobody else may be waiting: don't warn about an unretrieved exception
+        task.cancelled() or task.exception()
+
+    async def _send(self, endpoint: str, url: str, params: dict | None, json_body) -> httpx.Response:
+        await self.limit.acquire()
+        started = time.monotonic()
+        try:
+            resp = await timed_helius_request(endpoint, self._client.post(url, params=params, json=json_body))
+        except asyncio.CancelledError:
+            self.limit.release()
+            raise
+        except Exception:
+            self.limit.release(overloaded=True)
+            raise
+        overloaded = resp.status_code == 429 or resp.status_code >= 500
+        self.limit.release(overloaded, time.monotonic() - started)
+        return resp
@@ -0,0 +1,214 @@
+# solana_tracker/ingest.py
+#
+# Bounded queue between the websocket listeners and tx_worker.
+#
+# A job counts against `ingest_max_depth` from `put` until it is acked, which
+# tx_worker does once the transaction has been parsed (or dead-lettered). Jobs
+# parked in the retry scheduler still hold their slot, so re-queueing them never
+# blocks. When the queue is full, live notifications wait for room (backpressure
+# reaches the websocket reader) and push out queued backfill jobs, while new
+# backfill jobs are shed right away. A shed signature is forgotten by the
+# deduper, so a later backfill or replay can offer it again.
+#
+# Within a priority, jobs are bucketed per wallet and served by deficit round
+# robin (see fairness.FairQueue), so one noisy wallet only delays itself.
+#
+# SqliteIngestQueue additionally journals every unacked job, so a restart picks
+# up where the previous process stopped.
+import asyncio
+import sqlite3
+import time
+from pathlib import Path
+
+from loguru import logger
+
+from config import config
+from metrics import registry
+from .dedup import deduper
+from .fairness import FairQueue
+from .jobs import TxJob, LIVE, BACKFILL
+
+ingest_shed = registry.counter("tracker_ingest_shed_total", "Jobs shed because the ingest queue was full", ("priority",))
+ingest_blocked = registry.counter("tracker_ingest_blocked_total", "Live puts that had to wait for room")
+PRIORITY_NAMES = {LIVE: "live", BACKFILL: "backfill"}
+
+
+class IngestQueue:
+    """In-memory bounded priority queue with ack. Jobs are lost on restart."""
+
+    def __init__(self, max_depth: int = config.ingest_max_depth):
+        self.max_depth = max_depth
+        self._ready: dict[int, FairQueue] = {LIVE: FairQueue(), BACKFILL: FairQueue()}
+        self._unacked: dict[int, TxJob] = {}
+        self._ids = 0
+        self._readable = asyncio.Event()
+        self._writable = asyncio.Event()
+        self.shed = 0
+
+    @property
+    def depth(self) -> int:
+        """Jobs not acked yet: queued, being processed or waiting for a retry."""
+        return len(self._unacked)
+
+    def qsize(self) -> int:
+        """Jobs ready to be picked up."""
+        return sum(len(q) for q in self._ready.values())
+
+    def backlog(self, priority: int = LIVE) -> dict[str, int]:
+        """Ready jobs per wallet."""
+        return self._ready[priority].backlog()
+
+    def empty(self) -> bool:
+        return not any(self._ready.values())
+
+    def full(self) -> bool:
+        return self.depth >= self.max_depth
+
+    async def put(self, job: TxJob) -> bool:
+        """Queue a job. Returns False if it was shed instead."""
+        job.queued_at = time.monotonic()
+        if job.id is not None and job.id in self._unacked:
+            # retry of a job that already owns a slot
+            self._store(job)
+            self._push(job)
+            return True
+
+        if self.full() and not self._make_room(job):
+            if job.priority >= BACKFILL:
+                self._shed(job)
+                return False
+
+            ingest_blocked.inc()
+            while self.full() and not self._make_room(job):
+                self._writable.clear()
+                await self._writable.wait()
+
+        self._ids += 1
+        job.id = self._ids
+        self._unacked[job.id] = job
+        self._store(job)
+        self._push(job)
+        return True
+
+    def _make_room(self, job: TxJob) -> bool:
+        # evict a job of a lower priority, if there is one
+        for priority in sorted(self._ready, reverse=True):
+            if priority <= job.priority:
+                break
+            if self._ready[priority]:
+                victim = self._ready[priority].pop_newest()
+                self._unacked.pop(victim.id, None)
+                self._delete(victim)
+                self._shed(victim)
+                return True
+        return False
+
+    def _shed(self, job: TxJob):
+        # every wallet merged into this job was riding on it: a later offer must queue it again
+        deduper.forget(job.signature)
+        self.shed += 1
+        ingest_shed.inc(priority=PRIORITY_NAMES.get(job.priority, str(job.priority)))
+        logger.warning(
+            "🚧 Ingest queue full ({depth}/{max_depth}), shed {priority} job {signature}",
+            depth=self.depth, max_depth=self.max_depth, priority=PRIORITY_NAMES.get(job.priority),
+            signature=job.signature, wallet=job.wallet
+        )
+
+    def _push(self, job: TxJob):
+        self._ready.setdefault(job.priority, FairQueue()).append(job)
+        self._readable.set()
+
+    def get_nowait(self) -> TxJob:
+        for priority in sorted(self._ready):
+            if self._ready[priority]:
+                return self._ready[priority].popleft()
+        raise asyncio.QueueEmpty
+
+    async def get(self) -> TxJob:
+        while self.empty():
+            self._readable.clear()
+            await self._readable.wait()
+        return self.get_nowait()
+
+    def ack(self, job: TxJob):
+        """The job is finished with, successfully or not: release its slot."""
+        if self._unacked.pop(job.id, None) is None:
+            return
+        self._delete(job)
+        self._writable.set()
+
+    # persistence hooks, no-ops in memory
+    def _store(self, job: TxJob):
+        pass
+
+    def _delete(self, job: TxJob):
+        pass
+
+    async def load(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SqliteIngestQueue(IngestQueue):
+    """IngestQueue journaled to a local SQLite file.
+
+    Writes are synchronous but tiny (WAL, synchronous=NORMAL: no fsync per
+    commit), so they stay well under the cost of a single Helius round-trip.
+    The journal is separate from DATABASE_PATH on purpose: it must be local
+    and cheap even when the main database is PostgreSQL.
+    """
+
+    def __init__(self, path: str = config.ingest_path, max_depth: int = config.ingest_max_depth):
+        super().__init__(max_depth)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS ingest_jobs ("
+            " id INTEGER PRIMARY KEY,"
+            " signature TEXT NOT NULL,"
+            " wallet TEXT NOT NULL,"
+            " priority INTEGER NOT NULL,"
+            " attempt INTEGER NOT NULL DEFAULT 0,"
+            " enqueued_at REAL NOT NULL)"
+        )
+
+    def _store(self, job: TxJob):
+        self._db.execute(
+            "INSERT OR REPLACE INTO ingest_jobs (id, signature, wallet, priority, attempt, enqueued_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job.id, job.signature, job.wallet, job.priority, job.attempt, time.time())
+        )
+
+    def _delete(self, job: TxJob):
+        self._db.execute("DELETE FROM ingest_jobs WHERE id = ?", (job.id,))
+
+    async def load(self):
+        rows = self._db.execute(
+            "SELECT id, signature, wallet, priority, attempt FROM ingest_jobs ORDER BY id"
+        ).fetchall()
+
+        for id_, signature, wallet, priority, attempt in rows:
+            job = TxJob(signature, wallet, attempt=attempt, priority=priority, id=id_)
+            # so a backfill of the same signature doesn't queue it twice
+            deduper.offer(signature, wallet)
+            self._unacked[id_] = job
+            self._push(job)
+        self._ids = max(self._unacked, default=0)
+
+        if rows:
+            logger.info(f"📥 Restored {len(rows)} unacked jobs from {self.path}")
+
+    def close(self):
+        self._db.close()
+
+
+def create_ingest_queue() -> IngestQueue:
+    if config.ingest_backend == "memory":
+        return IngestQueue()
+    if config.ingest_backend == "sqlite":
+        return SqliteIngestQueue()
+    raise ValueError(f"Unknown INGEST_BACKEND {config.ingest_backend!r} (expected 'sqlite' or 'memory')")
@@ -0,0 +1,18 @@
+# solana_tracker/jobs.py
+from dataclasses import dataclass, field
+from time import monotonic
+
+# ingest priorities, lower is more important
+LIVE = 0        # logsNotification
+BACKFILL = 1    # getSignaturesForAddress catch-up, shed first under pressure
+
+
+@dataclass(slots=True)
+class TxJob:
+    signature: str
+    wallet: str
+    attempt: int = 0
+    priority: int = LIVE
+    id: int | None = None   # set by the ingest queue, kept until the job is acked
+    received_at: float = field(default_factory=monotonic)
+    queued_at: float = field(default_factory=monotonic)   # reset every time it is (re)queued
@@ -1,35 +1,354 @@
 # solana_tracker/listener.py
 import asyncio
 import json
+import random
+import time
+from itertools import count
 from websockets import connect
+from websockets.exceptions import ConnectionClosed
 from config import config
 from loguru import logger
 
-WSS_URL = f"wss://mainnet.helius-rpc.com/?api-key={config.helius_api_key}"
+from metrics import ws_notifications
 
-async def listen_wallet(wallet: str, queue: asyncio.Queue):
-    async with connect(WSS_URL, ping_interval=30, ping_timeout=30) as ws:
-        await ws.send(json.dumps({
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "logsSubscribe",
-            "params": [
-                {"mentions": [wallet]},
-                {"commitment": "confirmed"}
-            ]
-        }))
+from solana_tracker.cursors import cursor_store
+from solana_tracker.dedup import deduper
+from solana_tracker.prefilter import prefilter
+from solana_tracker.fairness import rate_cap
+from solana_tracker.provisional import Provisional, decode_hint, provisional_feed
+from solana_tracker.jobs import TxJob, BACKFILL
+from solana_tracker.ingest import IngestQueue
+from solana_tracker.helius import HeliusClient
+from solana_tracker.schema import SchemaError, WsMessage, decode_logs_params, decode_ws_message
+
+WSS_URL = f"{config.helius_ws_url}/?api-key={config.helius_api_key}"
+RPC_URL = f"{config.helius_rpc_url}/?api-key={config.helius_api_key}"
+RECONNECT_BASE_DELAY = 1
+# fast mode trades certainty for latency: alerts at `processed` get confirmed later
+COMMITMENT = "processed" if config.fast_mode else "confirmed"
+
+
+def reconnect_delay(attempt: int) -> float:
+    # exponential backoff with jitter so pooled sockets don't reconnect in lockstep
+    delay = min(config.ws_reconnect_max_delay, RECONNECT_BASE_DELAY * 2 ** attempt)
+    return random.uniform(delay / 2, delay)
+
+
+class PooledConnection:
+    """One websocket carrying up to `max_subscriptions` logsSubscribe subscriptions."""
+
+    def __init__(self, pool: "SubscriptionPool", index: int):
+        self.pool = pool
+        self.index = index
+        self.ws = None
+        self.wallets: dict[str, int | None] = {}        # wallet -> subscription id
+        self.subscriptions: dict[int, str] = {}         # subscription id -> wallet
+        self.pending: dict[int, tuple[str, str]] = {}   # request id -> (method, wallet)
+        self.needs_backfill: set[str] = set()
+        self.task: asyncio.Task | None = None
+        self.blocked = False              # reader parked on a full ingest queue
+        self.unblocked_at = 0.0           # monotonic time it last got room
+
+    @property
+    def load(self) -> int:
+        return len(self.wallets)
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def close(self):
+        if self.task:
+            self.task.cancel()
+        if self.ws:
+            await self.ws.close()
+
+    async def run(self):
+        attempt = 0
+        while True:
+            try:
+                async with connect(WSS_URL, ping_interval=None) as ws:
+                    self.ws = ws
+                    attempt = 0
+                    logger.info(f"🔌 Connection #{self.index} opened, {self.load} wallets")
 
-        logger.info(f"📡 Listening wallet: {wallet}")
+                    # re-subscribe everything this socket is responsible for and
+                    # backfill whatever happened while it was down
+                    self.needs_backfill |= set(self.wallets)
+                    for wallet in list(self.wallets):
+                        await self._subscribe(wallet)
 
+                    watchdog = asyncio.create_task(self._watchdog(ws))
+                    try:
+                        async for msg in ws:
+                            try:
+                                message = decode_ws_message(msg)
+                            except SchemaError as e:
+                                logger.warning(f"⚠️ Undecodable message on #{self.index}: {e}")
+                                continue
+                            await self._handle(message)
+                    finally:
+                        watchdog.cancel()
+
+                logger.warning(f"Connection #{self.index} closed by server")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Connection #{self.index}: {type(e).__name__} {e}")
+            finally:
+                self.ws = None
+                self.subscriptions.clear()
+                self.pending.clear()
+                for wallet in self.wallets:
+                    self.wallets[wallet] = None
+
+            delay = reconnect_delay(attempt)
+            attempt += 1
+            logger.warning(f"🔁 Reconnecting #{self.index} in {delay:.1f}s (attempt {attempt})")
+            await asyncio.sleep(delay)
+
+    async def _watchdog(self, ws):
+        """Application-level liveness: a socket that stops answering pings is torn down."""
         while True:
-            msg = await ws.recv()
-            data = json.loads(msg)
+            await asyncio.sleep(config.ws_ping_interval)
+            try:
+                pong = await ws.ping()
+                await asyncio.wait_for(pong, config.ws_stall_timeout)
+            except (asyncio.TimeoutError, ConnectionClosed) as e:
+                if isinstance(e, asyncio.TimeoutError) and self._backpressured():
+                    # the pong is there, unread: the reader waits for room in the ingest queue
+                    logger.debug(f"🐶 Connection #{self.index} held by ingest backpressure, not stalled")
+                    continue
+                logger.warning(f"🐶 Connection #{self.index} stalled, forcing reconnect")
+                await ws.close()
+                return
+
+    def _backpressured(self) -> bool:
+        return self.blocked or time.monotonic() - self.unblocked_at < config.ws_stall_timeout
+
+    async def _enqueue(self, job: TxJob) -> bool:
+        """Live put from the reader loop. It may wait for room; the watchdog knows."""
+        if not self.pool.queue.full():
+            return await self.pool.queue.put(job)
+
+        self.blocked = True
+        try:
+            return await self.pool.queue.put(job)
+        finally:
+            self.blocked = False
+            self.unblocked_at = time.monotonic()
+
+    async def _backfill(self, wallet: str):
+        cursor = cursor_store.get(wallet)
+        if cursor is None:
+            return
+
+        try:
+            resp = await self.pool.client.post("rpc", RPC_URL, json_body={
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "getSignaturesForAddress",
+                "params": [
+                    wallet,
+                    {"until": cursor.signature, "limit": config.backfill_limit, "commitment": "confirmed"}
+                ]
+            })
+            items = resp.json().get("result") or []
+        except Exception as e:
+            logger.error(f"❌ Backfill for {wallet} failed: {type(e).__name__} {e}")
+            return
+
+        if not items:
+            return
+        if len(items) >= config.backfill_limit:
+            logger.warning(f"Backfill for {wallet} hit the limit of {config.backfill_limit}, older txs are lost")
+
+        queued = shed = 0
+        # own task (pool.spawn), not the reader, and backfill puts never wait: they are shed
+        # oldest first, so notifications keep their order
+        for item in reversed(items):
+            if item.get("err") is None and deduper.offer(item["signature"], wallet):
+                if await self.pool.queue.put(TxJob(item["signature"], wallet, priority=BACKFILL)):
+                    queued += 1
+                else:
+                    shed += 1
+
+        cursor_store.update(wallet, items[0]["signature"], items[0]["slot"])
+        logger.info(f"⏪ Backfilled {queued} txs for {wallet} since slot {cursor.slot}" + (f", {shed} shed" if shed else ""))
+
+    async def subscribe(self, wallet: str):
+        self.wallets[wallet] = None
+        await self._subscribe(wallet)
+
+    async def unsubscribe(self, wallet: str):
+        sub_id = self.wallets.pop(wallet, None)
+        self.needs_backfill.discard(wallet)
+        if sub_id is not None:
+            self.subscriptions.pop(sub_id, None)
+            await self._send("logsUnsubscribe", [sub_id], wallet)
+        logger.info(f"🔕 Stopped listening wallet: {wallet}")
+
+    async def _subscribe(self, wallet: str):
+        await self._send(
+            "logsSubscribe",
+            [
+                {"mentions": [wallet]},
+                {"commitment": COMMITMENT}
+            ],
+            wallet
+        )
+
+    async def _send(self, method: str, params: list, wallet: str):
+        if self.ws is None:
+            # not connected: run() re-subscribes everything on reconnect
+            return
+
+        request_id = next(self.pool.request_ids)
+        self.pending[request_id] = (method, wallet)
+        try:
+            await self.ws.send(json.dumps({
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "method": method,
+                "params": params
+            }))
+        except ConnectionClosed:
+            self.pending.pop(request_id, None)
+
+    async def _handle(self, message: WsMessage):
+        if message.id in self.pending:
+            method, wallet = self.pending.pop(message.id)
+            if message.error is not None:
+                logger.error(f"{method} failed for {wallet}: {message.error}")
+                return
+
+            if method == "logsSubscribe":
+                sub_id = message.result
+                if wallet not in self.wallets:
+                    # wallet was removed while the subscribe was in flight
+                    await self._send("logsUnsubscribe", [sub_id], wallet)
+                    return
+                self.wallets[wallet] = sub_id
+                self.subscriptions[sub_id] = wallet
+                logger.info(f"📡 Listening wallet: {wallet} (#{self.index}, sub {sub_id})")
+
+                # backfill only once the subscription is live, dedup absorbs the overlap
+                if wallet in self.needs_backfill:
+                    self.needs_backfill.discard(wallet)
+                    self.pool.spawn(self._backfill(wallet))
+            return
+
+        if message.method != "logsNotification":
+            return
+
+        try:
+            params = decode_logs_params(message.params)
+        except SchemaError as e:
+            logger.warning(f"⚠️ Malformed logsNotification on #{self.index}: {e}")
+            return
+        wallet = self.subscriptions.get(params.subscription)
+        if wallet is None:
+            return
+
+        ws_notifications.inc(wallet=wallet)
+        value = params.result.value
+        if not config.fast_mode:
+            # a processed tx can still be dropped; fast mode moves the cursor in tx_worker
+            cursor_store.update(wallet, value.signature, params.result.context.slot)
+        if value.err is None:
+            signature = value.signature
+            rule = prefilter.skip_reason(value.logs)
+            if rule:
+                logger.debug("🧹 Prefiltered tx for {wallet}: {signature} ({rule})", wallet=wallet, signature=signature, rule=rule)
+                return
+            # before the deduper: a capped wallet must not be fanned out with another one's fetch
+            if not rate_cap.allow(wallet, signature):
+                logger.debug("⏩ Rate-capped tx for {wallet}: {signature}", wallet=wallet, signature=signature)
+                return
+            if not deduper.offer(signature, wallet):
+                logger.debug("🔁 Duplicate tx for {wallet}: {signature}", wallet=wallet, signature=signature)
+                return
+            logger.info("🔍 New tx for {wallet}: {signature}", wallet=wallet, signature=signature)
+            job = TxJob(signature, wallet)
+            if await self._enqueue(job) and config.fast_mode:
+                hint = decode_hint(value.logs)
+                if hint:
+                    provisional_feed.publish(Provisional(signature, wallet, hint, job.received_at))
+
+
+class SubscriptionPool:
+    """Packs wallet subscriptions onto as few websockets as `max_subscriptions` allows."""
+
+    def __init__(
+        self,
+        queue: IngestQueue,
+        client: HeliusClient,
+        max_subscriptions: int = config.max_subscriptions
+    ):
+        self.queue = queue
+        self.client = client
+        self.max_subscriptions = max_subscriptions
+        self.connections: list[PooledConnection] = []
+        self.owners: dict[str, PooledConnection] = {}
+        self.request_ids = count(1)
+        self._connection_ids = count(1)
+        self._background: set[asyncio.Task] = set()
+
+    @property
+    def wallets(self) -> set[str]:
+        return set(self.owners)
+
+    def __contains__(self, wallet: str) -> bool:
+        return wallet in self.owners
+
+    async def subscribe(self, wallet: str, backfill: bool = False):
+        """`backfill`: catch up from the wallet's cursor once the subscription is live."""
+        if wallet in self.owners:
+            return
+
+        conn = next(
+            (c for c in self.connections if c.load < self.max_subscriptions),
+            None
+        )
+        if conn is None:
+            conn = PooledConnection(self, next(self._connection_ids))
+            self.connections.append(conn)
+            conn.start()
+
+        self.owners[wallet] = conn
+        if backfill:
+            conn.needs_backfill.add(wallet)
+        await conn.subscribe(wallet)
+
+    def spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def supervise(self):
+        """Restart connection tasks that died despite the reconnect loop."""
+        for conn in self.connections:
+            if conn.task and conn.task.done() and not conn.task.cancelled():
+                logger.error(f"❌ Connection #{conn.index} task died: {conn.task.exception()!r}, restarting")
+                conn.needs_backfill |= set(conn.wallets)
+                conn.start()
+
+    async def unsubscribe(self, wallet: str, forget: bool = True):
+        """`forget=False` keeps the cursor, for wallets handed over to another shard."""
+        conn = self.owners.pop(wallet, None)
+        if conn is None:
+            return
+
+        if forget:
+            cursor_store.forget(wallet)
 
-            if data.get("method") != "logsNotification":
-                continue
+        await conn.unsubscribe(wallet)
+        if conn.load == 0:
+            self.connections.remove(conn)
+            await conn.close()
+            logger.info(f"🔌 Connection #{conn.index} closed, no wallets left")
 
-            value = data["params"]["result"]["value"]
-            if value["err"] is None:
-                signature = value["signature"]
-                logger.info(f"🔍 New tx for {wallet}: {signature}")
-                await queue.put((signature, wallet))
+    async def close(self):
+        for conn in self.connections:
+            await conn.close()
+        self.connections.clear()
+        self.owners.clear()
@@ -0,0 +1,100 @@
+# solana_tracker/prefilter.py
+#
+# Cheap decision on the logsNotification payload, before a signature costs a
+# queue slot and a Helius enhanced-API credit. Rules are checked in order:
+#
+#   allow-program / allow-pattern   always fetch, overrides everything below
+#   deny-program                    a listed program was invoked
+#   deny-pattern                    a log line matches
+#   system-spam                     only System / ComputeBudget invoked, at least
+#                                   `prefilter_spam_min_invokes` times (multi-account
+#                                   dust transfers, which the classifier drops anyway)
+#
+# Anything the filter can't judge (no logs, truncated logs) is fetched.
+import re
+
+from config import config
+from metrics import registry
+
+SYSTEM_PROGRAM = "11111111111111111111111111111111"
+COMPUTE_BUDGET_PROGRAM = "ComputeBudget111111111111111111111111111111"
+NOISE_PROGRAMS = frozenset({SYSTEM_PROGRAM, COMPUTE_BUDGET_PROGRAM})
+
+INVOKE_RE = re.compile(r"^Program (\w+) invoke \[(\d+)\]")
+TRUNCATED = "Log truncated"
+
+prefilter_skipped = registry.counter(
+    "tracker_prefilter_skipped_total", "Notifications not fetched, by prefilter rule", ("rule",)
+)
+prefilter_passed = registry.counter(
+    "tracker_prefilter_passed_total", "Notifications let through, by reason", ("rule",)
+)
+
+
+class Prefilter:
+    def __init__(
+        self,
+        allow_programs: list[str] = config.prefilter_allow_programs,
+        deny_programs: list[str] = config.prefilter_deny_programs,
+        allow_patterns: list[str] = config.prefilter_allow_patterns,
+        deny_patterns: list[str] = config.prefilter_deny_patterns,
+        spam_min_invokes: int = config.prefilter_spam_min_invokes,
+        enabled: bool = config.prefilter_enabled,
+    ):
+        self.enabled = enabled
+        self.allow_programs = frozenset(allow_programs)
+        self.deny_programs = frozenset(deny_programs)
+        # compiled once; the pattern text doubles as the metric label
+        self.allow_patterns = [(p, re.compile(p)) for p in allow_patterns]
+        self.deny_patterns = [(p, re.compile(p)) for p in deny_patterns]
+        self.spam_min_invokes = spam_min_invokes
+
+    def skip_reason(self, logs: list[str] | None) -> str | None:
+        """Name of the rule that rejects this notification, or None to fetch it."""
+        if not self.enabled:
+            return None
+        if not logs or any(TRUNCATED in line for line in logs):
+            prefilter_passed.inc(rule="no-logs")
+            return None
+
+        invoked: list[str] = []   # top-level invocations, in order
+        programs: set[str] = set()
+        for line in logs:
+            match = INVOKE_RE.match(line)
+            if match:
+                programs.add(match.group(1))
+                if match.group(2) == "1":
+                    invoked.append(match.group(1))
+
+        if programs & self.allow_programs:
+            prefilter_passed.inc(rule="allow-program")
+            return None
+        for pattern, regex in self.allow_patterns:
+            if any(regex.search(line) for line in logs):
+                prefilter_passed.inc(rule=f"allow:{pattern}")
+                return None
+
+        denied = programs & self.deny_programs
+        if denied:
+            return self._skip(f"deny-program:{min(denied)}")
+        for pattern, regex in self.deny_patterns:
+            if any(regex.search(line) for line in logs):
+                return self._skip(f"deny:{pattern}")
+
+        if (
+            self.spam_min_invokes
+            and programs
+            and programs <= NOISE_PROGRAMS
+            and invoked.count(SYSTEM_PROGRAM) >= self.spam_min_invokes
+        ):
+            return self._skip("system-spam")
+
+        prefilter_passed.inc(rule="default")
+        return None
+
+    def _skip(self, rule: str) -> str:
+        prefilter_skipped.inc(rule=rule)
+        return rule
+
+
+prefilter = Prefilter()
@@ -0,0 +1,81 @@
+# solana_tracker/provisional.py
+#
+# Fast mode (FAST_MODE=1): the listener subscribes at `processed` and, for every
+# new signature whose logs say what it probably is, publishes a Provisional on
+# `provisional_feed` once the job is queued. workers.confirmations sends it right
+# away and later edits the same message with the full enhanced parse, or retracts it.
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from loguru import logger
+
+from .prefilter import INVOKE_RE, SYSTEM_PROGRAM, COMPUTE_BUDGET_PROGRAM
+
+TOKEN_PROGRAM = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+TOKEN_2022_PROGRAM = "TokenzQdBNbLqP5VEhdkAS6EPFLC1PY5F8ZpcBjEKSu2a"
+ASSOCIATED_TOKEN_PROGRAM = "ATokenGPvbdGVxr1b2hvZbsiqW5xWH8ftRkfbbeHPHp"
+
+DEX_PROGRAMS = {
+    "JUP6LkbZbjS1jKKwapdHNy74zcZ3tLUZoi5QNyVTaV4": "Jupiter",
+    "whirLbMiicVdio4qvUfM5KAg6Ct8VwpYzGff3uctyCc": "Orca",
+    "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8": "Raydium",
+    "CAMMCzo5YL8w4VFF8KVHrK22GGUsp5VTaW7grrKgrWqK": "Raydium",
+    "CPMMoo8L3F4NbTegBCKVNunggL7H1ZpdTHKxQB5qKP1C": "Raydium",
+}
+TRANSFER_PROGRAMS = frozenset({
+    SYSTEM_PROGRAM, COMPUTE_BUDGET_PROGRAM, TOKEN_PROGRAM, TOKEN_2022_PROGRAM, ASSOCIATED_TOKEN_PROGRAM
+})
+
+
+@dataclass(slots=True, frozen=True)
+class Hint:
+    side: str                  # SWAP / TRANSFER
+    venue: str | None = None   # DEX name for swaps
+
+
+@dataclass(slots=True)
+class Provisional:
+    signature: str
+    wallet: str
+    hint: Hint
+    received_at: float = field(default_factory=time.monotonic)
+
+
+def decode_hint(logs: list[str] | None) -> Hint | None:
+    """Best guess from the notification logs alone, None when there is nothing worth announcing."""
+    if not logs:
+        return None
+
+    programs = set()
+    for line in logs:
+        match = INVOKE_RE.match(line)
+        if match:
+            programs.add(match.group(1))
+
+    for program, venue in DEX_PROGRAMS.items():
+        if program in programs:
+            return Hint("SWAP", venue)
+    if programs and programs <= TRANSFER_PROGRAMS and programs - {COMPUTE_BUDGET_PROGRAM}:
+        return Hint("TRANSFER")
+    return None
+
+
+class ProvisionalFeed:
+    """Synchronous fan-out, so the alert is queued before a worker can finish the job."""
+
+    def __init__(self):
+        self._handlers: list[Callable[[Provisional], None]] = []
+
+    def subscribe(self, handler: Callable[[Provisional], None]):
+        self._handlers.append(handler)
+
+    def publish(self, item: Provisional):
+        for handler in self._handlers:
+            try:
+                handler(item)
+            except Exception as e:
+                logger.error(f"❌ Provisional alert {item.signature}: {type(e).__name__} {e}")
+
+
+provisional_feed = ProvisionalFeed()
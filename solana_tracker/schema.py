@@ -0,0 +1,130 @@
+# solana_tracker/schema.py
+#
+# Typed decoding of what Helius sends us, with msgspec: payloads are decoded
+# straight from the response bytes into Structs and validated on the way. Only
+# the fields the tracker reads are declared; the rest of an enhanced-transaction
+# document (accountData, instructions, events, ...) is skipped, never materialised.
+#
+# TxEvent is what the classifier produces: an immutable record, symbols are
+# filled in with `dataclasses.replace`.
+from dataclasses import dataclass
+from typing import Any
+
+import msgspec
+from loguru import logger
+
+
+class SchemaError(ValueError):
+    """A payload that doesn't match the expected shape."""
+
+
+class TokenTransfer(msgspec.Struct, frozen=True, gc=False, rename="camel"):
+    mint: str
+    token_amount: float
+    from_user_account: str | None = None
+    to_user_account: str | None = None
+
+
+class NativeTransfer(msgspec.Struct, frozen=True, gc=False, rename="camel"):
+    amount: int
+    from_user_account: str | None = None
+    to_user_account: str | None = None
+
+
+class EnhancedTransaction(msgspec.Struct, frozen=True, gc=False, rename="camel"):
+    signature: str
+    type: str | None = None
+    source: str | None = None
+    fee: int | None = None
+    description: str | None = None
+    token_transfers: tuple[TokenTransfer, ...] = ()
+    native_transfers: tuple[NativeTransfer, ...] = ()
+    transaction_error: Any = None
+    slot: int | None = None
+
+
+class LogsContext(msgspec.Struct, frozen=True, gc=False):
+    slot: int
+
+
+class LogsValue(msgspec.Struct, frozen=True, gc=False):
+    signature: str
+    err: Any = None
+    logs: list[str] | None = None
+
+
+class LogsResult(msgspec.Struct, frozen=True, gc=False):
+    context: LogsContext
+    value: LogsValue
+
+
+class LogsParams(msgspec.Struct, frozen=True, gc=False):
+    subscription: int
+    result: LogsResult
+
+
+class WsMessage(msgspec.Struct, frozen=True):
+    id: int | None = None
+    result: Any = None
+    error: Any = None
+    method: str | None = None
+    params: msgspec.Raw = msgspec.Raw()   # decoded by decode_logs_params once the method is known
+
+
+# one raw slice per transaction: a malformed entry costs only itself
+_batch_decoder = msgspec.json.Decoder(list[msgspec.Raw])
+_tx_decoder = msgspec.json.Decoder(EnhancedTransaction | None)
+_ws_decoder = msgspec.json.Decoder(WsMessage)
+_logs_decoder = msgspec.json.Decoder(LogsParams)
+
+
+def _decode(decoder: msgspec.json.Decoder, data):
+    try:
+        return decoder.decode(data)
+    except msgspec.DecodeError as e:
+        raise SchemaError(str(e)) from e
+
+
+def decode_ws_message(raw: str | bytes) -> WsMessage:
+    return _decode(_ws_decoder, raw)
+
+
+def decode_logs_params(params: msgspec.Raw) -> LogsParams:
+    return _decode(_logs_decoder, params)
+
+
+def decode_transactions(content: bytes) -> list[EnhancedTransaction]:
+    """Decode an enhanced-transactions response body.
+
+    Entries are validated one by one: a malformed transaction is logged and left
+    out (it is retried like an unindexed one) instead of failing the whole batch.
+    """
+    transactions = []
+    for item in _decode(_batch_decoder, content):
+        try:
+            tx = _decode(_tx_decoder, item)
+        except SchemaError as e:
+            logger.warning(f"⚠️ Malformed transaction in Helius response: {e}")
+            continue
+        if tx is not None and tx.signature:
+            transactions.append(tx)
+    return transactions
+
+
+@dataclass(slots=True, frozen=True)
+class TxEvent:
+    signature: str
+    wallet: str
+    side: str                          # SWAP / TRANSFER / SKIPPED / DROPPED
+    sent_amount: float | None = None
+    sent_mint: str | None = None
+    sent_symbol: str | None = None
+    recv_amount: float | None = None
+    recv_mint: str | None = None
+    recv_symbol: str | None = None
+    to_address: str | None = None
+    aggregator: str | None = None
+    description: str | None = None
+    tx_type: str | None = None         # SKIPPED: what Helius called it
+    source: str | None = None
+    reason: str | None = None          # DROPPED: why
@@ -0,0 +1,168 @@
+# solana_tracker/token_cache.py
+import asyncio
+import time
+from collections import OrderedDict
+
+from loguru import logger
+from sqlalchemy import select
+
+from config import config, TOKEN_SYMBOLS
+from db.engine import AsyncSession
+from db.models import Token, TokenMetadata
+from metrics import registry
+from .helius import HeliusClient
+
+METADATA_URL = f"{config.helius_api_url}/v0/token-metadata"
+MAX_MINTS_PER_REQUEST = 100
+NEVER = float("inf")
+
+
+class TokenCache:
+    """LRU + TTL cache of mint -> symbol, persisted to `token_metadata`.
+
+    Misses that arrive within `token_batch_delay_ms` of each other are merged
+    into one `mintAccounts` request. A `None` symbol is a cached negative result.
+    """
+
+    def __init__(self):
+        self._entries: OrderedDict[str, tuple[str | None, float]] = OrderedDict()
+        self._pending: dict[str, asyncio.Future] = {}
+        self._flush_task: asyncio.Task | None = None
+        self.client: HeliusClient | None = None
+        self.hits = 0
+        self.misses = 0
+
+    async def start(self, client: HeliusClient):
+        self.client = client
+        now = time.time()
+
+        async with AsyncSession() as session:
+            stored = (await session.execute(
+                select(TokenMetadata.mint, TokenMetadata.symbol, TokenMetadata.fetched_at)
+            )).all()
+            tokens = (await session.execute(
+                select(Token.mint, Token.symbol).distinct()
+            )).all()
+
+        for mint, symbol, fetched_at in stored:
+            ttl = config.token_cache_ttl if symbol else config.token_cache_negative_ttl
+            if fetched_at + ttl > now:
+                self._put(mint, symbol, fetched_at + ttl)
+
+        # symbols users already added and the built-in ones never expire
+        for mint, symbol in tokens:
+            self._put(mint, symbol, NEVER)
+        for mint, symbol in TOKEN_SYMBOLS.items():
+            if len(mint) >= 32:
+                self._put(mint, symbol, NEVER)
+
+        logger.info(f"🪙 Token cache loaded with {len(self._entries)} mints")
+
+    def _put(self, mint: str, symbol: str | None, expires_at: float):
+        self._entries[mint] = (symbol, expires_at)
+        self._entries.move_to_end(mint)
+        while len(self._entries) > config.token_cache_size:
+            self._entries.popitem(last=False)
+
+    def _lookup(self, mint: str) -> tuple[bool, str | None]:
+        entry = self._entries.get(mint)
+        if entry is None:
+            return False, None
+
+        symbol, expires_at = entry
+        if expires_at < time.time():
+            del self._entries[mint]
+            return False, None
+
+        self._entries.move_to_end(mint)
+        return True, symbol
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    async def get_symbol(self, mint: str) -> str | None:
+        found, symbol = self._lookup(mint)
+        if found:
+            self.hits += 1
+            return symbol
+
+        self.misses += 1
+        future = self._pending.get(mint)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[mint] = future
+            if self._flush_task is None or self._flush_task.done():
+                self._flush_task = asyncio.create_task(self._flush())
+
+        return await asyncio.shield(future)
+
+    async def get_symbols(self, mints) -> dict[str, str | None]:
+        mints = list(dict.fromkeys(mints))
+        symbols = await asyncio.gather(*(self.get_symbol(mint) for mint in mints))
+        return dict(zip(mints, symbols))
+
+    async def _flush(self):
+        await asyncio.sleep(config.token_batch_delay_ms / 1000)
+
+        pending, self._pending = self._pending, {}
+        mints = list(pending)
+
+        for i in range(0, len(mints), MAX_MINTS_PER_REQUEST):
+            chunk = mints[i:i + MAX_MINTS_PER_REQUEST]
+            try:
+                symbols = await self._fetch(chunk)
+            except Exception as e:
+                logger.error(f"Token metadata fetch failed: {type(e).__name__} {e}")
+                symbols = None
+
+            for mint in chunk:
+                future = pending[mint]
+                if not future.done():
+                    future.set_result(symbols.get(mint) if symbols else None)
+
+        # misses that arrived while we were fetching
+        if self._pending:
+            self._flush_task = asyncio.create_task(self._flush())
+
+    async def _fetch(self, mints: list[str]) -> dict[str, str | None] | None:
+        resp = await self.client.post(
+            "token-metadata",
+            METADATA_URL,
+            params={"api-key": config.helius_api_key},
+            json_body={"mintAccounts": mints}
+        )
+
+        if resp.status_code != 200:
+            # transient failure: don't poison the cache
+            logger.error(f"Helius returned {resp.status_code} for metadata of {len(mints)} mints")
+            return None
+
+        data = resp.json() or []
+        symbols = {mint: None for mint in mints}
+        for metadata in data:
+            if not metadata:
+                continue
+            try:
+                symbols[metadata["account"]] = metadata["onChainMetadata"]["metadata"]["data"]["symbol"] or None
+            except (KeyError, TypeError):
+                pass
+
+        now = time.time()
+        for mint, symbol in symbols.items():
+            ttl = config.token_cache_ttl if symbol else config.token_cache_negative_ttl
+            self._put(mint, symbol, now + ttl)
+
+        async with AsyncSession() as session:
+            for mint, symbol in symbols.items():
+                await session.merge(TokenMetadata(mint=mint, symbol=symbol, fetched_at=now))
+            await session.commit()
+
+        return symbols
+
+
+token_cache = TokenCache()
+registry.counter("tracker_token_cache_hits_total", "Token symbol cache hits").set_function(lambda: token_cache.hits)
+registry.counter("tracker_token_cache_misses_total", "Token symbol cache misses").set_function(lambda: token_cache.misses)
+registry.gauge("tracker_token_cache_hit_ratio", "Token symbol cache hit ratio").set_function(lambda: token_cache.hit_rate)
@@ -1,2 +1,5 @@
-from .rate_limit import semaphore
+from .rate_limit import TokenBucket
 from .wallet_dispatcher import WalletDispatcher
+from .routing import routing_index
+from .events import events
+from .sharding import shard
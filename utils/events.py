@@ -0,0 +1,48 @@
+# utils/events.py
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from loguru import logger
+
+Handler = Callable[[Any], Awaitable[None]]
+
+
+@dataclass(slots=True, frozen=True)
+class UserChanged:
+    """A user's wallets, tokens or own enabled flag changed in the database."""
+    telegram_id: int
+    remote: bool = False   # replayed from another node's change, see utils/sharding.py
+
+
+@dataclass(slots=True, frozen=True)
+class AddressesChanged:
+    """Delta of the set of addresses that need a live subscription."""
+    added: frozenset[str] = field(default_factory=frozenset)
+    removed: frozenset[str] = field(default_factory=frozenset)
+
+
+@dataclass(slots=True, frozen=True)
+class ShardsChanged:
+    """The set of live tracker nodes changed, so wallet ownership moved."""
+    nodes: tuple[str, ...]
+
+
+class EventBus:
+    """In-process pub/sub: handlers run in subscription order inside `publish`."""
+
+    def __init__(self):
+        self._handlers: dict[type, list[Handler]] = defaultdict(list)
+
+    def subscribe(self, event_type: type, handler: Handler):
+        self._handlers[event_type].append(handler)
+
+    async def publish(self, event):
+        for handler in list(self._handlers[type(event)]):
+            try:
+                await handler(event)
+            except Exception as e:
+                logger.error(f"❌ {type(event).__name__} handler {handler.__qualname__}: {type(e).__name__} {e}")
+
+
+events = EventBus()
@@ -1,25 +1,135 @@
 # utils/log.py
-from loguru import logger
+#
+# Sinks:
+#   консоль  LOG_LEVEL and up
+#   файл     ./logs/log_file.log, INFO and up, rotated at 10 MB and gzipped
+#
+# Knobs for busy nodes:
+#   LOG_ASYNC=1          sinks are written by loguru's queue thread (enqueue):
+#                        the event loop only formats and enqueues
+#   LOG_JSON=1           one JSON object per line; keyword arguments of a log call
+#                        (logger.info("... {wallet}", wallet=w)) become fields
+#   LOG_SAMPLE_BURST=N   at most N records per call site per LOG_SAMPLE_WINDOW
+#                        seconds below ERROR; the next one let through says how
+#                        many were suppressed
+# Rotated files are compressed by a separate thread, never by the one logging.
+import gzip
+import json
+import os
+import shutil
 import sys
+import threading
+import time
+import traceback
+
+from loguru import logger
+
+from config import config
+from metrics import registry
+
+LOG_FILE = "./logs/log_file.log"
+NEVER_SAMPLED = logger.level("ERROR").no
+
+log_suppressed = registry.counter("tracker_log_suppressed_total", "Log records dropped by sampling", ("level",))
+
+
+class Sampler:
+    """Loguru filter: the first `burst` records of every `window` per call site pass."""
+
+    def __init__(self, burst: int, window: float):
+        self.burst = burst
+        self.window = window
+        self._sites: dict[tuple[str, int], list] = {}   # (module, line) -> [window start, seen, suppressed]
+
+    def __call__(self, record) -> bool:
+        # one decision per record, whichever sink asks first
+        decision = record["extra"].get("_sampled")
+        if decision is None:
+            decision = self._decide(record)
+            record["extra"]["_sampled"] = decision
+        return decision
+
+    def _decide(self, record) -> bool:
+        if record["level"].no >= NEVER_SAMPLED:
+            return True
+
+        now = time.monotonic()
+        key = (record["name"], record["line"])
+        site = self._sites.get(key)
+        if site is None or now - site[0] >= self.window:
+            suppressed = site[2] if site else 0
+            site = self._sites[key] = [now, 0, 0]
+            if suppressed:
+                record["message"] += f" (+{suppressed} similar suppressed in {self.window:g}s)"
+                record["extra"]["suppressed"] = suppressed
+
+        site[1] += 1
+        if site[1] <= self.burst:
+            return True
+        site[2] += 1
+        log_suppressed.inc(level=record["level"].name)
+        return False
+
+
+def json_format(record) -> str:
+    """Loguru format function: the record as one JSON line."""
+    if "_json" in record["extra"]:
+        # already serialized for the other sink
+        return "{extra[_json]}\n"
+
+    data = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "name": record["name"],
+        "line": record["line"],
+        "message": record["message"],
+    }
+    data.update((key, value) for key, value in record["extra"].items() if not key.startswith("_"))
+    if record["exception"]:
+        data["exception"] = "".join(traceback.format_exception(*record["exception"]))
+    record["extra"]["_json"] = json.dumps(data, ensure_ascii=False, default=str)
+    return "{extra[_json]}\n"
+
+
+def _gzip(path: str):
+    try:
+        with open(path, "rb") as src, gzip.open(f"{path}.gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(path)
+    except OSError as e:
+        # the uncompressed file stays, nothing is lost
+        print(f"Log compression of {path} failed: {e}", file=sys.stderr)
+
+
+def compress_in_background(path: str):
+    threading.Thread(target=_gzip, args=(path,), name="log-compress", daemon=True).start()
+
 
 def setup_logger():
     logger.remove()
+    sampler = Sampler(config.log_sample_burst, config.log_sample_window) if config.log_sample_burst > 0 else None
 
     # 🔹 Консоль
     logger.add(
         sys.stdout,
-        level="DEBUG",
-        format="<green>{time:HH:mm:ss}</green> | "
-               "<level>{level}</level> | "
-               "<cyan>{name}</cyan>:<cyan>{line}</cyan> - "
-               "<level>{message}</level>"
+        level=config.log_level,
+        enqueue=config.log_async,
+        filter=sampler,
+        format=json_format if config.log_json else (
+            "<green>{time:HH:mm:ss}</green> | "
+            "<level>{level}</level> | "
+            "<cyan>{name}</cyan>:<cyan>{line}</cyan> - "
+            "<level>{message}</level>"
+        )
     )
 
     # 🔹 Файл
     logger.add(
-        "./logs/log_file.log",
+        LOG_FILE,
         level="INFO",
         rotation="10 MB",
-        compression="gz",
-        format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {name}:{line} - {message}"
+        compression=compress_in_background,
+        enqueue=config.log_async,
+        filter=sampler,
+        format=json_format if config.log_json else "{time:YYYY-MM-DD HH:mm:ss} | {level} | {name}:{line} - {message}"
     )
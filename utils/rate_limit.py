@@ -1,5 +1,28 @@
 # utils/rate_limit.py
 import asyncio
-from config import config
+from time import monotonic
 
-semaphore = asyncio.Semaphore(config.semaphore_limit)
\ No newline at end of file
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = monotonic()
+        self._lock = asyncio.Lock()
+
+    def set_rate(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = min(self.tokens, capacity)
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
@@ -0,0 +1,157 @@
+# utils/routing.py
+from dataclasses import dataclass
+
+from loguru import logger
+from sqlalchemy import select
+
+from config import config
+from db.engine import AsyncSession
+from db.models import User, Wallet, Token
+from solana_tracker.fairness import WalletPolicy, wallet_policies
+from utils.events import events, UserChanged, AddressesChanged
+
+
+@dataclass(slots=True, frozen=True)
+class Route:
+    telegram_id: int
+    label: str
+    tokens: frozenset[str]   # enabled token symbols, lowercased
+    weight: int = 1
+    rate_cap: int = 0        # 0 = unlimited
+    digest: bool = False
+    digest_window: int = 60
+    digest_max_events: int = 20
+
+
+class RoutingIndex:
+    """In-memory wallet address -> subscribed users map for the notification path.
+
+    Only enabled users and enabled wallets are indexed. Loaded once at startup
+    and refreshed per user by the bot handlers after they commit a change.
+    """
+
+    def __init__(self):
+        self._by_wallet: dict[str, dict[int, Route]] = {}
+        self._user_wallets: dict[int, set[str]] = {}
+
+    def routes(self, address: str) -> list[Route]:
+        return list(self._by_wallet.get(address, {}).values())
+
+    def addresses(self) -> set[str]:
+        return set(self._by_wallet)
+
+    def _sync_policy(self, address: str):
+        """Fold every user's settings for `address` into one WalletPolicy: the most
+        generous one wins, a single unlimited route lifts the cap."""
+        routes = self._by_wallet.get(address)
+        if not routes:
+            wallet_policies.discard(address)
+            return
+
+        caps = [route.rate_cap for route in routes.values()]
+        wallet_policies.set(address, WalletPolicy(
+            weight=max(route.weight for route in routes.values()),
+            rate_cap=0 if 0 in caps else max(caps),
+        ))
+
+    async def load(self):
+        async with AsyncSession() as session:
+            users = (await session.execute(
+                select(User).where(User.telegram_id.in_(config.whitelisted_user_ids))
+            )).scalars().all()
+            wallets = (await session.execute(
+                select(Wallet).join(User).where(
+                    User.telegram_id.in_(config.whitelisted_user_ids),
+                    Wallet.enabled.is_(True)
+                )
+            )).scalars().all()
+            tokens = (await session.execute(
+                select(Token).join(User).where(
+                    User.telegram_id.in_(config.whitelisted_user_ids),
+                    Token.enabled.is_(True)
+                )
+            )).scalars().all()
+
+        previous = set(self._by_wallet)
+        self._by_wallet.clear()
+        self._user_wallets.clear()
+        for user in users:
+            self._index_user(
+                user,
+                [w for w in wallets if w.user_id == user.id],
+                [t for t in tokens if t.user_id == user.id]
+            )
+        for address in previous | set(self._by_wallet):
+            self._sync_policy(address)
+
+        logger.info(f"🧭 Routing index loaded: {len(self._by_wallet)} wallets, {len(users)} users")
+
+    async def on_user_changed(self, event: UserChanged):
+        added, removed = await self.refresh_user(event.telegram_id)
+        if added or removed:
+            await events.publish(AddressesChanged(added=added, removed=removed))
+
+    async def refresh_user(self, telegram_id: int) -> tuple[frozenset[str], frozenset[str]]:
+        """Re-read one user. Returns the (added, removed) addresses of the whole index."""
+        async with AsyncSession() as session:
+            user = await session.scalar(
+                select(User).where(User.telegram_id == telegram_id)
+            )
+            wallets, tokens = [], []
+            if user:
+                wallets = (await session.execute(
+                    select(Wallet).where(Wallet.user_id == user.id, Wallet.enabled.is_(True))
+                )).scalars().all()
+                tokens = (await session.execute(
+                    select(Token).where(Token.user_id == user.id, Token.enabled.is_(True))
+                )).scalars().all()
+
+        before = self._user_wallets.get(telegram_id, set())
+        known = {address for address in before if address in self._by_wallet}
+        new = {w.address for w in wallets if w.address not in self._by_wallet}
+
+        self._drop_user(telegram_id)
+        if user and telegram_id in config.whitelisted_user_ids:
+            self._index_user(user, wallets, tokens)
+
+        for address in before | {w.address for w in wallets}:
+            self._sync_policy(address)
+
+        added = frozenset(a for a in new if a in self._by_wallet)
+        removed = frozenset(a for a in known if a not in self._by_wallet)
+        return added, removed
+
+    def _drop_user(self, telegram_id: int):
+        for address in self._user_wallets.pop(telegram_id, set()):
+            routes = self._by_wallet.get(address)
+            if routes is None:
+                continue
+            routes.pop(telegram_id, None)
+            if not routes:
+                del self._by_wallet[address]
+
+    def _index_user(self, user: User, wallets: list[Wallet], tokens: list[Token]):
+        if not user.enabled:
+            return
+
+        symbols = frozenset(t.symbol_norm or t.symbol.lower() for t in tokens)
+        user_digest = config.digest if user.digest is None else user.digest
+        addresses = set()
+        for wallet in wallets:
+            route = Route(
+                telegram_id=user.telegram_id,
+                label=wallet.label,
+                tokens=symbols,
+                weight=wallet.weight or 1,
+                rate_cap=config.wallet_rate_cap if wallet.rate_cap is None else wallet.rate_cap,
+                digest=user_digest if wallet.digest is None else wallet.digest,
+                digest_window=user.digest_window or config.digest_window,
+                digest_max_events=user.digest_max_events or config.digest_max_events,
+            )
+            self._by_wallet.setdefault(wallet.address, {})[user.telegram_id] = route
+            addresses.add(wallet.address)
+        self._user_wallets[user.telegram_id] = addresses
+
+
+routing_index = RoutingIndex()
+events.subscribe(UserChanged, routing_index.on_user_changed)
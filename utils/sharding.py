@@ -0,0 +1,192 @@
+# utils/sharding.py
+#
+# Sharded mode (SHARDING=1): several tracker processes share one database.
+# Each one heartbeats a row in `node_leases`; the live rows form a consistent
+# hash ring, and a wallet is subscribed only by the node it hashes to. When a
+# node joins or its lease expires the ring changes on every survivor within one
+# heartbeat and WalletDispatcher moves the affected wallets.
+#
+# One node also holds the `telegram-poller` lease in `leader_leases`: getUpdates
+# must only be polled once per bot token. Every node still *sends* alerts, each
+# with a 1/N share of TELEGRAM_GLOBAL_RATE (see workers/notifier.py).
+#
+# Edits made through the bot reach only the poller's in-process event bus, so
+# every UserChanged is also written to `user_changes`; each heartbeat replays
+# the other nodes' rows as local UserChanged events.
+import asyncio
+import bisect
+import hashlib
+import time
+
+from loguru import logger
+from sqlalchemy import delete, func, insert, or_, select, update
+
+from config import config
+from db.engine import AsyncSession, insert_ignore
+from db.models import LeaderLease, NodeLease, UserChange
+from utils.events import events, ShardsChanged, UserChanged
+
+POLLER_ROLE = "telegram-poller"
+
+
+def hash_key(key: str) -> int:
+    # stable across processes, unlike hash()
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hashing with `vnodes` points per node: a node joining or leaving
+    only moves ~1/N of the wallets."""
+
+    def __init__(self, nodes: tuple[str, ...], vnodes: int = config.shard_vnodes):
+        points = sorted((hash_key(f"{node}#{i}"), node) for node in nodes for i in range(vnodes))
+        self._keys = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def owner(self, key: str) -> str | None:
+        if not self._keys:
+            return None
+        i = bisect.bisect(self._keys, hash_key(key)) % len(self._keys)
+        return self._nodes[i]
+
+
+class ShardCoordinator:
+    def __init__(self, node_id: str = config.node_id, enabled: bool = config.sharding):
+        self.node_id = node_id
+        self.enabled = enabled
+        self.nodes: tuple[str, ...] = (node_id,)
+        self.ring = HashRing(self.nodes)
+        self.started_at = time.time()
+        self._leader_until = 0.0
+        self._leader = asyncio.Event()
+        self._follower = asyncio.Event()
+        self._change_cursor: int | None = None   # last user_changes row seen
+        if enabled:
+            self._follower.set()
+        else:
+            self._leader.set()   # a single node does everything
+
+    def owns(self, address: str) -> bool:
+        return not self.enabled or self.ring.owner(address) == self.node_id
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader.is_set()
+
+    async def wait_leader(self):
+        await self._leader.wait()
+
+    async def wait_follower(self):
+        await self._follower.wait()
+
+    def _set_leader(self, leader: bool):
+        if leader == self._leader.is_set():
+            return
+        if leader:
+            self._follower.clear()
+            self._leader.set()
+            logger.success(f"👑 {self.node_id} is now the {POLLER_ROLE}")
+        else:
+            self._leader.clear()
+            self._follower.set()
+            logger.warning(f"👑 {self.node_id} is no longer the {POLLER_ROLE}")
+
+    async def _claim_leadership(self, session, now: float) -> bool:
+        expires_at = now + config.shard_lease_ttl
+        # renew our own lease or take over an expired one; a single UPDATE, so two
+        # nodes racing for an expired lease can't both win
+        result = await session.execute(
+            update(LeaderLease)
+            .where(LeaderLease.role == POLLER_ROLE)
+            .where(or_(LeaderLease.node_id == self.node_id, LeaderLease.expires_at < now))
+            .values(node_id=self.node_id, expires_at=expires_at)
+        )
+        if not result.rowcount:
+            await session.execute(
+                insert_ignore(LeaderLease).values(role=POLLER_ROLE, node_id=self.node_id, expires_at=expires_at)
+            )
+
+        holder = await session.scalar(select(LeaderLease.node_id).where(LeaderLease.role == POLLER_ROLE))
+        if holder == self.node_id:
+            self._leader_until = expires_at
+            return True
+        return False
+
+    async def heartbeat(self):
+        now = time.time()
+        async with AsyncSession() as session:
+            await session.merge(NodeLease(node_id=self.node_id, heartbeat_at=now, started_at=self.started_at))
+            # long-dead nodes: keep the table small, the ring ignores them anyway
+            await session.execute(delete(NodeLease).where(NodeLease.heartbeat_at < now - 10 * config.shard_lease_ttl))
+            live = (await session.execute(
+                select(NodeLease.node_id).where(NodeLease.heartbeat_at >= now - config.shard_lease_ttl)
+            )).scalars().all()
+            leader = await self._claim_leadership(session, now)
+            changed = await self._poll_changes(session, now)
+            await session.commit()
+
+        self._set_leader(leader)
+        for telegram_id in changed:
+            await events.publish(UserChanged(telegram_id, remote=True))
+
+        nodes = tuple(sorted(set(live) | {self.node_id}))
+        if nodes != self.nodes:
+            logger.info(f"🧩 Shard ring: {len(self.nodes)} -> {len(nodes)} nodes {list(nodes)}")
+            self.nodes = nodes
+            self.ring = HashRing(nodes)
+            await events.publish(ShardsChanged(nodes))
+
+    async def _poll_changes(self, session, now: float) -> list[int]:
+        """Users changed by other nodes since the last heartbeat."""
+        await session.execute(delete(UserChange).where(UserChange.changed_at < now - 10 * config.shard_lease_ttl))
+        if self._change_cursor is None:
+            # first heartbeat: routing_index.load() read everything already
+            self._change_cursor = await session.scalar(select(func.max(UserChange.id))) or 0
+            return []
+
+        rows = (await session.execute(
+            select(UserChange.id, UserChange.telegram_id, UserChange.node_id)
+            .where(UserChange.id > self._change_cursor)
+            .order_by(UserChange.id)
+        )).all()
+        if rows:
+            self._change_cursor = rows[-1].id
+        return list(dict.fromkeys(row.telegram_id for row in rows if row.node_id != self.node_id))
+
+    async def on_user_changed(self, event: UserChanged):
+        if not self.enabled or event.remote:
+            return
+        async with AsyncSession() as session:
+            await session.execute(
+                insert(UserChange).values(telegram_id=event.telegram_id, node_id=self.node_id, changed_at=time.time())
+            )
+            await session.commit()
+
+    async def leave(self):
+        """Graceful shutdown: give up the lease so the others rebalance right away."""
+        async with AsyncSession() as session:
+            await session.execute(delete(NodeLease).where(NodeLease.node_id == self.node_id))
+            await session.execute(
+                delete(LeaderLease).where(LeaderLease.role == POLLER_ROLE, LeaderLease.node_id == self.node_id)
+            )
+            await session.commit()
+        self._set_leader(False)
+
+    async def run(self):
+        if not self.enabled:
+            return
+
+        while True:
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                logger.error(f"❌ Shard heartbeat failed: {type(e).__name__} {e}")
+                # can't renew: step down before someone else may take over
+                if time.time() >= self._leader_until - config.shard_heartbeat_interval:
+                    self._set_leader(False)
+
+            await asyncio.sleep(config.shard_heartbeat_interval)
+
+
+shard = ShardCoordinator()
+events.subscribe(UserChanged, shard.on_user_changed)
@@ -1,42 +1,74 @@
 # utils/wallet_dispatcher.py
 import asyncio
-from sqlalchemy import select
-from db.engine import AsyncSession
-from db.models import Wallet, User
-from solana_tracker import listen_wallet
+from loguru import logger
+from config import config
+from solana_tracker import SubscriptionPool, cursor_store, event_store
+from utils.events import events, AddressesChanged, ShardsChanged
+from utils.routing import routing_index
+from utils.sharding import shard
 
 class WalletDispatcher:
-    def __init__(self, queue):
+    def __init__(self, queue, client):
         self.queue = queue
-        self.tasks: dict[str, asyncio.Task] = {}
-
-    async def load_enabled_wallets(self) -> set[str]:
-        async with AsyncSession() as session:
-            result = await session.execute(
-                select(Wallet.address)
-                .join(User)
-                .where(
-                    Wallet.enabled.is_(True),
-                    User.enabled.is_(True)
-                )
-            )
-            return set(result.scalars().all())
+        self.pool = SubscriptionPool(queue, client)
+        events.subscribe(AddressesChanged, self.on_addresses_changed)
+        events.subscribe(ShardsChanged, self.on_shards_changed)
+
+    async def on_addresses_changed(self, event: AddressesChanged):
+        # ➕ подписываем новые (только свой шард)
+        for address in event.added:
+            if shard.owns(address):
+                await self.pool.subscribe(address)
+
+        # ➖ отписываем выключенные
+        for address in event.removed:
+            await self.pool.unsubscribe(address)
+
+    async def on_shards_changed(self, event: ShardsChanged):
+        owned = {a for a in routing_index.addresses() if shard.owns(a)}
+        gained = owned - self.pool.wallets
+        lost = self.pool.wallets - owned
+
+        # hand over: keep the cursor and flush it so the new owner resumes from it
+        for address in lost:
+            await self.pool.unsubscribe(address, forget=False)
+        if lost:
+            await cursor_store.flush()
+
+        if gained:
+            # take over: resume from the previous owner's cursor and know what it already alerted
+            await cursor_store.load(gained)
+            await event_store.load(gained)
+            for address in gained:
+                await self.pool.subscribe(address, backfill=True)
+
+        if gained or lost:
+            logger.info(f"🧩 Rebalance on {shard.node_id}: +{len(gained)} / -{len(lost)} wallets, {len(owned)} owned")
+
+    async def reconcile(self):
+        self.pool.supervise()
+        await routing_index.load()
+        enabled_wallets = routing_index.addresses()
+        owned = {a for a in enabled_wallets if shard.owns(a)}
+
+        added = owned - self.pool.wallets
+        removed = self.pool.wallets - enabled_wallets
+        handed_off = self.pool.wallets - owned - removed
+        if added or removed:
+            logger.info(f"🔄 Reconcile: +{len(added)} / -{len(removed)} wallets")
+        await self.on_addresses_changed(
+            AddressesChanged(added=frozenset(added), removed=frozenset(removed))
+        )
+        for address in handed_off:
+            await self.pool.unsubscribe(address, forget=False)
 
     async def run(self):
+        # changes made through the bot arrive as events (on other nodes via the
+        # shard heartbeat, see utils/sharding.py); this is only a safety net
         while True:
-            enabled_wallets = await self.load_enabled_wallets()
-
-            # ➕ запускаем новые
-            for address in enabled_wallets:
-                if address not in self.tasks:
-                    self.tasks[address] = asyncio.create_task(
-                        listen_wallet(address, self.queue)
-                    )
-
-            # ➖ останавливаем выключенные
-            for address in list(self.tasks):
-                if address not in enabled_wallets:
-                    self.tasks[address].cancel()
-                    del self.tasks[address]
-
-            await asyncio.sleep(5)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error(f"❌ Reconcile failed: {type(e).__name__} {e}")
+
+            await asyncio.sleep(config.reconcile_interval)
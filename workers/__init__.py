@@ -1 +1,6 @@
-from .solana_worker import tx_worker
\ No newline at end of file
+from .solana_worker import tx_worker, overflow_summaries
+from .notifier import notifier
+from .confirmations import confirmations
+from .digest import digests
+from .retry import retry_scheduler
+from .pool import WorkerPool
\ No newline at end of file
@@ -0,0 +1,108 @@
+# workers/confirmations.py
+#
+# Fast mode: provisional alerts at `processed`, edited in place once the
+# enhanced API returns the transaction (it only indexes confirmed ones), or
+# retracted if it failed, was dropped, or turned out not to be worth an alert.
+import asyncio
+
+from loguru import logger
+
+from metrics import registry
+from solana_tracker.provisional import Provisional, provisional_feed
+from utils.routing import routing_index
+from workers.notifier import notifier
+
+
+class ConfirmationTracker:
+    def __init__(self):
+        # (signature, wallet) -> chat_id -> (wallet label, future of the provisional Message)
+        self._alerts: dict[tuple[str, str], dict[int, tuple[str, asyncio.Future]]] = {}
+        self._edits: set[asyncio.Task] = set()
+        self.provisional = 0
+        self.confirmed = 0
+        self.retracted = 0
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+    def announce(self, item: Provisional):
+        # digest routes get their alert folded in later, not a message per tx
+        routes = [route for route in routing_index.routes(item.wallet) if not route.digest]
+        if not routes:
+            return
+
+        what = f"{item.hint.side} on {item.hint.venue}" if item.hint.venue else item.hint.side
+        alerts = self._alerts.setdefault((item.signature, item.wallet), {})
+        for route in routes:
+            alerts[route.telegram_id] = route.label, notifier.send(
+                chat_id=route.telegram_id,
+                parse_mode="HTML",
+                received_at=item.received_at,
+                stages=("first",),
+                text=(
+                    f"⏳ <b>PENDING {what}</b>\n\n"
+                    f"👛 <b>Wallet:</b> {route.label}\n"
+                    f"<i>Seen at processed commitment, details follow once confirmed.</i>\n\n"
+                    f"🔗 <a href='https://solscan.io/tx/{item.signature}'>View on Solscan</a>"
+                )
+            )
+        self.provisional += 1
+
+    def deliver(self, chat_id: int, signature: str, wallet: str, text: str, received_at: float | None = None):
+        """Send the final alert, as an edit of the provisional one if there is one."""
+        alert = self._alerts.get((signature, wallet), {}).pop(chat_id, None)
+        if alert is None:
+            notifier.send(chat_id=chat_id, parse_mode="HTML", received_at=received_at, text=text)
+            return
+
+        _, future = alert
+        self.confirmed += 1
+        self._spawn(self._edit(future, chat_id, text, received_at, ("final",)))
+
+    def settle(self, signature: str, wallet: str, reason: str):
+        """Retract every provisional alert for the pair that `deliver` didn't replace."""
+        alerts = self._alerts.pop((signature, wallet), None)
+        if not alerts:
+            return
+
+        for chat_id, (label, future) in alerts.items():
+            text = (
+                f"❎ <s>PENDING</s> <b>RETRACTED</b>: {reason}\n\n"
+                f"👛 <b>Wallet:</b> {label}\n\n"
+                f"🔗 <a href='https://solscan.io/tx/{signature}'>View on Solscan</a>"
+            )
+            self.retracted += 1
+            self._spawn(self._edit(future, chat_id, text, None, ()))
+        logger.info("❎ Retracted provisional alert {signature} [{wallet}]: {reason}",
+                    signature=signature, wallet=wallet, reason=reason)
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._edits.add(task)
+        task.add_done_callback(self._edits.discard)
+
+    async def _edit(self, future: asyncio.Future, chat_id: int, text: str,
+                    received_at: float | None, stages: tuple[str, ...]):
+        # the provisional message has to be out before it can be edited
+        message = await future
+        if message is None:
+            # provisional send failed: don't leave the user without the final one
+            if stages:
+                notifier.send(chat_id=chat_id, parse_mode="HTML", received_at=received_at, text=text)
+            return
+        notifier.send(
+            chat_id=chat_id,
+            parse_mode="HTML",
+            received_at=received_at,
+            stages=stages,
+            message_id=message.message_id,
+            text=text
+        )
+
+
+confirmations = ConfirmationTracker()
+provisional_feed.subscribe(confirmations.announce)
+registry.gauge("tracker_provisional_pending", "Provisional alerts waiting for confirmation").set_function(lambda: len(confirmations))
+registry.counter("tracker_provisional_sent_total", "Provisional alerts sent").set_function(lambda: confirmations.provisional)
+registry.counter("tracker_provisional_confirmed_total", "Provisional alerts edited into the final one").set_function(lambda: confirmations.confirmed)
+registry.counter("tracker_provisional_retracted_total", "Provisional alerts retracted").set_function(lambda: confirmations.retracted)
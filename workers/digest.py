@@ -0,0 +1,145 @@
+# workers/digest.py
+#
+# Digest mode: alerts for a (chat, wallet) are held for `digest_window` seconds
+# from the first one, or until `digest_max_events` arrived, and go out as one
+# message with totals per token pair and the net flow per token. A window that
+# caught a single event sends that event's normal alert.
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+from loguru import logger
+
+from metrics import registry
+from solana_tracker.schema import TxEvent
+from utils.routing import Route
+from workers.notifier import notifier
+
+
+@dataclass(slots=True)
+class PairTotal:
+    count: int = 0
+    sent: float = 0.0
+    recv: float = 0.0
+
+
+@dataclass(slots=True)
+class Digest:
+    chat_id: int
+    wallet: str
+    label: str
+    started_at: float = field(default_factory=time.monotonic)
+    received_at: float | None = None   # of the first event, for the latency histograms
+    events: int = 0
+    first_text: str = ""
+    last_signature: str = ""
+    skipped: int = 0
+    pairs: dict[tuple[str, str, str], PairTotal] = field(default_factory=dict)   # (side, sent, recv)
+    net: dict[str, float] = field(default_factory=dict)                          # symbol -> net flow
+    timer: asyncio.TimerHandle | None = None
+
+    def add(self, event: TxEvent, text: str, received_at: float | None):
+        if not self.events:
+            self.first_text = text
+            self.received_at = received_at
+        self.events += 1
+        self.last_signature = event.signature
+
+        side = event.side
+        if side == "SKIPPED":
+            self.skipped += 1
+            return
+
+        sent_symbol = display_symbol(event.sent_symbol)
+        recv_symbol = display_symbol(event.recv_symbol) if side == "SWAP" else ""
+        sent_amount = event.sent_amount or 0.0
+        recv_amount = (event.recv_amount or 0.0) if side == "SWAP" else 0.0
+
+        total = self.pairs.get((side, sent_symbol, recv_symbol))
+        if total is None:
+            total = self.pairs[(side, sent_symbol, recv_symbol)] = PairTotal()
+        total.count += 1
+        total.sent += sent_amount
+        total.recv += recv_amount
+
+        # running net flow: nothing to recompute at flush time
+        self.net[sent_symbol] = self.net.get(sent_symbol, 0.0) - sent_amount
+        if recv_symbol:
+            self.net[recv_symbol] = self.net.get(recv_symbol, 0.0) + recv_amount
+
+    def render(self) -> str:
+        lines = [
+            f"🧾 <b>DIGEST</b>: {self.label}",
+            f"{self.events} transactions in {time.monotonic() - self.started_at:.0f}s",
+            "",
+        ]
+        for (side, sent, recv), total in sorted(self.pairs.items(), key=lambda item: -item[1].count):
+            if side == "SWAP":
+                lines.append(f"💱 {sent} → {recv} ×{total.count}: {total.sent:.6f} → {total.recv:.9f}")
+            else:
+                lines.append(f"📤 {sent} ×{total.count}: {total.sent:.6f}")
+        if self.skipped:
+            lines.append(f"⚠️ Skipped ×{self.skipped}")
+
+        flows = [(symbol, value) for symbol, value in self.net.items() if value]
+        if flows:
+            lines += ["", "📊 <b>Net flow:</b>"]
+            lines += [f"{symbol}: {value:+.6f}" for symbol, value in sorted(flows, key=lambda item: item[1])]
+
+        lines += [
+            "",
+            f"👛 <a href='https://solscan.io/account/{self.wallet}'>Wallet on Solscan</a>\n"
+            f"🔗 <a href='https://solscan.io/tx/{self.last_signature}'>Latest tx</a>"
+        ]
+        return "\n".join(lines)
+
+
+def display_symbol(symbol: str | None) -> str:
+    return "SOL" if symbol == "WSOL" else (symbol or "UNKNOWN")
+
+
+class DigestBuffer:
+    def __init__(self):
+        self._open: dict[tuple[int, str], Digest] = {}
+        self.digests = 0
+        self.folded = 0
+
+    def __len__(self) -> int:
+        return len(self._open)
+
+    def add(self, route: Route, event: TxEvent, text: str, received_at: float | None = None):
+        key = (route.telegram_id, event.wallet)
+        digest = self._open.get(key)
+        if digest is None:
+            digest = self._open[key] = Digest(route.telegram_id, event.wallet, route.label)
+            digest.timer = asyncio.get_running_loop().call_later(route.digest_window, self.flush, key)
+
+        digest.add(event, text, received_at)
+        if digest.events >= route.digest_max_events:
+            self.flush(key)
+
+    def flush(self, key: tuple[int, str]):
+        digest = self._open.pop(key, None)
+        if digest is None:
+            return
+        if digest.timer:
+            digest.timer.cancel()
+
+        if digest.events == 1:
+            text = digest.first_text
+        else:
+            text = digest.render()
+            self.digests += 1
+            self.folded += digest.events
+            logger.info(f"🧾 [{digest.wallet}] {digest.events} events folded into one digest for {digest.chat_id}")
+        notifier.send(chat_id=digest.chat_id, parse_mode="HTML", received_at=digest.received_at, text=text)
+
+    def flush_all(self):
+        for key in list(self._open):
+            self.flush(key)
+
+
+digests = DigestBuffer()
+registry.gauge("tracker_digests_open", "Digest windows collecting events").set_function(lambda: len(digests))
+registry.counter("tracker_digests_sent_total", "Digest messages sent").set_function(lambda: digests.digests)
+registry.counter("tracker_digest_events_total", "Events folded into digests").set_function(lambda: digests.folded)
@@ -0,0 +1,189 @@
+# workers/notifier.py
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+from aiogram.types import Message
+from loguru import logger
+
+from bot import bot
+from config import config
+from metrics import registry, telegram_send_seconds, telegram_errors, end_to_end_seconds, alert_latency_seconds
+from utils.events import events, ShardsChanged
+from utils.rate_limit import TokenBucket
+
+
+@dataclass(slots=True)
+class OutboundMessage:
+    chat_id: int
+    text: str
+    parse_mode: str
+    future: asyncio.Future
+    received_at: float | None = None   # logsNotification receipt, for the end-to-end histogram
+    stages: tuple[str, ...] = ("first", "final")   # which alert_latency stages this message completes
+    message_id: int | None = None      # set: edit that message instead of sending a new one
+    attempt: int = 0
+
+
+class Notifier:
+    """Outbound Telegram pipeline decoupled from tx_worker.
+
+    Messages wait in per-chat FIFOs. A chat is handed to at most one worker at a
+    time, spaced by `telegram_chat_interval`, and every send takes a token from
+    the global bucket. 429s push the chat back by `retry_after`. In sharded mode
+    every node sends with the same bot token, so each one gets an equal share of
+    `telegram_global_rate`.
+    """
+
+    def __init__(self, bot: Bot):
+        self.bot = bot
+        self.bucket = TokenBucket(config.telegram_global_rate, max(1, int(config.telegram_global_rate)))
+        self._queues: dict[int, deque[OutboundMessage]] = {}
+        self._ready: asyncio.Queue[int] = asyncio.Queue()
+        self._next_at: dict[int, float] = {}
+        self.sent = 0
+        self.failed = 0
+
+    @property
+    def pending(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    async def on_shards_changed(self, event: ShardsChanged):
+        rate = config.telegram_global_rate / len(event.nodes)
+        self.bucket.set_rate(rate, max(1, int(rate)))
+        logger.info(f"📮 Telegram send rate {rate:g} msg/s: {len(event.nodes)} nodes share the bot token")
+
+    def send(self, chat_id: int, text: str, parse_mode: str = "HTML",
+             received_at: float | None = None, stages: tuple[str, ...] = ("first", "final"),
+             message_id: int | None = None) -> asyncio.Future:
+        """Queue a message. The future resolves to the sent Message, or None if it was dropped."""
+        future = asyncio.get_running_loop().create_future()
+        message = OutboundMessage(chat_id, text, parse_mode, future, received_at, stages, message_id)
+
+        queue = self._queues.get(chat_id)
+        if queue is None:
+            self._queues[chat_id] = deque([message])
+            self._schedule(chat_id)
+        else:
+            queue.append(message)
+        return future
+
+    def _schedule(self, chat_id: int):
+        loop = asyncio.get_running_loop()
+        delay = self._next_at.get(chat_id, 0) - loop.time()
+        if delay > 0:
+            loop.call_later(delay, self._ready.put_nowait, chat_id)
+        else:
+            self._ready.put_nowait(chat_id)
+
+    async def run(self):
+        await asyncio.gather(*(self._worker() for _ in range(config.notifier_workers)))
+
+    async def drain(self, timeout: float):
+        """On shutdown, after run() was cancelled: deliver what is still queued, within `timeout`."""
+        if not self.pending:
+            return
+        logger.info(f"📮 Delivering {self.pending} queued messages before exit")
+        # chats taken by the cancelled workers never went back to _ready
+        self._ready = asyncio.Queue()
+        for chat_id in self._queues:
+            self._schedule(chat_id)
+
+        workers = asyncio.create_task(self.run())
+        deadline = time.monotonic() + timeout
+        try:
+            while self.pending and time.monotonic() < deadline:
+                await asyncio.sleep(0.1)
+        finally:
+            workers.cancel()
+            await asyncio.gather(workers, return_exceptions=True)
+        if self.pending:
+            logger.warning(f"⚠️ {self.pending} messages not delivered before exit")
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            chat_id = await self._ready.get()
+            queue = self._queues[chat_id]
+            message = queue[0]
+
+            try:
+                await self.bucket.acquire()
+                started = time.monotonic()
+                try:
+                    result = await self._deliver(message)
+                finally:
+                    telegram_send_seconds.observe(time.monotonic() - started)
+                queue.popleft()
+                self.sent += 1
+                if message.received_at is not None:
+                    elapsed = time.monotonic() - message.received_at
+                    for stage in message.stages:
+                        alert_latency_seconds.observe(elapsed, stage=stage)
+                    if "final" in message.stages:
+                        end_to_end_seconds.observe(elapsed)
+                self._next_at[chat_id] = loop.time() + config.telegram_chat_interval
+                if not message.future.done():
+                    message.future.set_result(result)
+
+            except TelegramRetryAfter as e:
+                telegram_errors.inc(error=type(e).__name__)
+                logger.warning(f"⏳ Telegram flood control for {chat_id}, retry after {e.retry_after}s")
+                self._next_at[chat_id] = loop.time() + e.retry_after
+
+            except (TelegramNetworkError, TelegramServerError) as e:
+                telegram_errors.inc(error=type(e).__name__)
+                message.attempt += 1
+                if message.attempt >= config.notifier_max_retry:
+                    self._drop(queue, message, e)
+                else:
+                    self._next_at[chat_id] = loop.time() + 2 ** message.attempt
+
+            except TelegramAPIError as e:
+                # blocked bot, bad HTML, ... retrying won't help
+                telegram_errors.inc(error=type(e).__name__)
+                self._drop(queue, message, e)
+
+            except Exception as e:
+                telegram_errors.inc(error=type(e).__name__)
+                message.attempt += 1
+                if message.attempt >= config.notifier_max_retry:
+                    self._drop(queue, message, e)
+                else:
+                    self._next_at[chat_id] = loop.time() + 2 ** message.attempt
+
+            if queue:
+                self._schedule(chat_id)
+            else:
+                del self._queues[chat_id]
+
+    async def _deliver(self, message: OutboundMessage) -> Message:
+        if message.message_id is not None:
+            return await self.bot.edit_message_text(
+                chat_id=message.chat_id,
+                message_id=message.message_id,
+                parse_mode=message.parse_mode,
+                text=message.text
+            )
+        return await self.bot.send_message(
+            chat_id=message.chat_id,
+            parse_mode=message.parse_mode,
+            text=message.text
+        )
+
+    def _drop(self, queue: deque, message: OutboundMessage, error: Exception):
+        queue.popleft()
+        self.failed += 1
+        logger.error(f"❌ Dropped message to {message.chat_id} after {message.attempt} attempts: {type(error).__name__} {error}")
+        if not message.future.done():
+            message.future.set_result(None)
+
+
+notifier = Notifier(bot)
+events.subscribe(ShardsChanged, notifier.on_shards_changed)
+registry.gauge("tracker_telegram_pending", "Messages waiting in per-chat queues").set_function(lambda: notifier.pending)
+registry.counter("tracker_telegram_sent_total", "Messages delivered to Telegram").set_function(lambda: notifier.sent)
+registry.counter("tracker_telegram_dropped_total", "Messages given up on").set_function(lambda: notifier.failed)
@@ -0,0 +1,117 @@
+# workers/pool.py
+import asyncio
+import math
+
+from loguru import logger
+
+from config import config
+from metrics import registry
+from solana_tracker import IngestQueue
+from workers.solana_worker import tx_worker, WorkerHandle
+from workers.stats import load_stats
+
+queue_depth = registry.gauge("tracker_queue_depth", "Jobs waiting in the ingest queue")
+queue_unacked = registry.gauge("tracker_ingest_unacked", "Jobs holding an ingest slot (queued, in flight or retrying)")
+pool_size = registry.gauge("tracker_worker_pool_size", "Running tx_worker tasks")
+pool_busy = registry.gauge("tracker_worker_pool_busy", "tx_worker tasks currently processing a batch")
+scale_events = registry.counter(
+    "tracker_worker_pool_scale_total", "Worker pool scaling decisions", ("direction", "reason")
+)
+
+
+class WorkerPool:
+    """tx_worker tasks between `workers_min` and `workers_max`, sized from queue depth,
+    queue wait time and Helius latency."""
+
+    def __init__(self, queue: IngestQueue, client,
+                 min_workers: int = config.workers_min, max_workers: int = config.workers_max):
+        self.queue = queue
+        self.client = client
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.workers: dict[asyncio.Task, WorkerHandle] = {}
+        self._idle_ticks = 0
+        queue_depth.set_function(queue.qsize)
+        queue_unacked.set_function(lambda: queue.depth)
+        pool_size.set_function(lambda: len(self.workers))
+        pool_busy.set_function(lambda: sum(not h.idle for h in self.workers.values()))
+
+    def _start_worker(self):
+        handle = WorkerHandle()
+        task = asyncio.create_task(tx_worker(self.queue, self.client, handle))
+        self.workers[task] = handle
+        task.add_done_callback(self._on_exit)
+
+    def _on_exit(self, task: asyncio.Task):
+        self.workers.pop(task, None)
+        if not task.cancelled() and task.exception():
+            logger.error(f"❌ tx_worker died: {task.exception()!r}")
+
+    def _stop_worker(self):
+        # prefer a worker parked on queue.get(): cancelling it can't lose a batch
+        for task, handle in self.workers.items():
+            if handle.idle and not handle.stopping:
+                task.cancel()
+                self.workers.pop(task)
+                return
+        for handle in self.workers.values():
+            if not handle.stopping:
+                handle.stopping = True   # exits after its current batch
+                return
+
+    def _active(self) -> int:
+        return sum(not h.stopping for h in self.workers.values())
+
+    def decide(self) -> tuple[int, str]:
+        """Return (target size, reason)."""
+        active = self._active()
+        depth = self.queue.qsize()
+        wait = load_stats.queue_wait.value
+        latency = load_stats.helius_latency.value
+
+        if depth > active * config.tx_batch_size or wait > config.autoscale_target_wait:
+            self._idle_ticks = 0
+            if latency > config.autoscale_max_helius_latency:
+                # Helius is the bottleneck: more workers would only add pressure
+                return active, "helius_slow"
+            wanted = active + max(1, math.ceil(depth / config.tx_batch_size) - active)
+            return min(self.max_workers, wanted), "backlog" if depth else "wait"
+
+        if depth == 0 and wait < config.autoscale_target_wait / 4:
+            self._idle_ticks += 1
+            if self._idle_ticks >= config.autoscale_idle_ticks:
+                self._idle_ticks = 0
+                return max(self.min_workers, active - 1), "idle"
+        else:
+            self._idle_ticks = 0
+
+        return active, "steady"
+
+    async def run(self):
+        for _ in range(self.min_workers):
+            self._start_worker()
+
+        while True:
+            await asyncio.sleep(config.autoscale_interval)
+
+            # replace crashed workers
+            while self._active() < self.min_workers:
+                self._start_worker()
+
+            active = self._active()
+            target, reason = self.decide()
+            if target > active:
+                for _ in range(target - active):
+                    self._start_worker()
+                scale_events.inc(direction="up", reason=reason)
+            elif target < active:
+                for _ in range(active - target):
+                    self._stop_worker()
+                scale_events.inc(direction="down", reason=reason)
+            else:
+                continue
+
+            logger.info(
+                f"⚖️ Worker pool {active} -> {target} ({reason}): depth={self.queue.qsize()} "
+                f"wait={load_stats.queue_wait.value:.2f}s helius={load_stats.helius_latency.value:.2f}s"
+            )
@@ -0,0 +1,88 @@
+# workers/retry.py
+import asyncio
+import heapq
+import random
+import time
+from itertools import count
+
+from loguru import logger
+
+from config import config
+from db.engine import AsyncSession
+from db.models import DeadLetter
+from metrics import registry
+from solana_tracker import TxJob, IngestQueue
+
+
+def retry_delay(attempt: int) -> float:
+    delay = min(config.retry_max_delay, config.retry_base_delay * 2 ** (attempt - 1))
+    return random.uniform(delay / 2, delay)
+
+
+class RetryScheduler:
+    """Time-ordered delay queue for jobs Helius couldn't serve yet.
+
+    Waiting happens here, not in tx_worker, so no worker or Helius concurrency slot is
+    parked during backoff. Jobs out of attempts go to `dead_letters`.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[float, int, TxJob]] = []
+        self._seq = count()
+        self._wakeup = asyncio.Event()
+        self.dead = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    async def schedule(self, job: TxJob, reason: str) -> bool:
+        """Returns False when the job ran out of attempts and was dead-lettered instead."""
+        job.attempt += 1
+        if job.attempt >= config.max_retry:
+            await self.dead_letter(job, reason)
+            return False
+
+        due = time.monotonic() + retry_delay(job.attempt)
+        heapq.heappush(self._heap, (due, next(self._seq), job))
+        self._wakeup.set()
+        return True
+
+    async def dead_letter(self, job: TxJob, reason: str):
+        self.dead += 1
+        logger.error(f"SKIP {job.signature} because after {job.attempt} reties we don't getting needed data ({reason})")
+        try:
+            async with AsyncSession() as session:
+                session.add(DeadLetter(
+                    signature=job.signature,
+                    wallet=job.wallet,
+                    attempts=job.attempt,
+                    reason=reason,
+                    failed_at=time.time()
+                ))
+                await session.commit()
+        except Exception as e:
+            logger.error(f"❌ Could not store dead letter {job.signature}: {type(e).__name__} {e}")
+
+    async def run(self, queue: IngestQueue):
+        while True:
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - time.monotonic()
+            if delay > 0:
+                # sleep until the earliest job is due, or an earlier one is scheduled
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, job = heapq.heappop(self._heap)
+            await queue.put(job)
+
+
+retry_scheduler = RetryScheduler()
+registry.gauge("tracker_retry_pending", "Jobs waiting in the retry scheduler").set_function(lambda: len(retry_scheduler))
+registry.counter("tracker_dead_letters_total", "Jobs that ran out of retries").set_function(lambda: retry_scheduler.dead)
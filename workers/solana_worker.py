@@ -1,116 +1,226 @@
 # workers/solana_worker.py
 import asyncio
-from solana_tracker import parse_transaction
-from utils import semaphore
+import time
+from dataclasses import dataclass
+from functools import partial
+from solana_tracker import parse_transactions, fetch_transactions, TxEvent, TxJob, IngestQueue, deduper, event_store, cursor_store
+from solana_tracker.fairness import rate_cap, wallet_policies
 from loguru import logger
-from bot import bot
+from workers.notifier import notifier
+from workers.confirmations import confirmations
+from workers.digest import digests
+from workers.retry import retry_scheduler
+from workers.stats import load_stats
 from config import config
-from db.models import User, Wallet, Token
-from db.engine import AsyncSession
-from sqlalchemy import select, func
+from utils.routing import Route, routing_index
+
+BATCH_POLL_INTERVAL = 0.005
 
 def short(addr: str, n=4):
     return f"{addr[:n]}...{addr[-n:]}"
 
 
-async def tx_worker(queue: asyncio.Queue, client):
+def deliver(route: Route, parsed_transaction: TxEvent, text: str, received_at: float | None = None):
+    if route.digest:
+        digests.add(route, parsed_transaction, text, received_at)
+    else:
+        confirmations.deliver(route.telegram_id, parsed_transaction.signature, parsed_transaction.wallet,
+                              text, received_at)
+
+
+async def notify_users(parsed_transaction: TxEvent, received_at: float | None = None):
+    signature = parsed_transaction.signature
+    sent_token_symbol = "SOL" if parsed_transaction.sent_symbol == "WSOL" else parsed_transaction.sent_symbol
+    sent_token_key = (sent_token_symbol or "").lower()
+
+    for route in routing_index.routes(parsed_transaction.wallet):
+        if parsed_transaction.side == "TRANSFER":
+            if sent_token_key in route.tokens:
+                deliver(
+                    route, parsed_transaction,
+                    received_at=received_at,
+                    text=(
+                        f"📤 <b>TRANSFER</b>\n\n"
+                        f"👛 <b>Wallet:</b> {route.label}\n"
+                        f"📦 <b>Amount:</b> {parsed_transaction.sent_amount:.6f} {sent_token_symbol}\n"
+                        f"➡️ <b>To:</b> <code>{short(parsed_transaction.to_address)}</code>\n\n"
+                        f"🔗 <a href='https://solscan.io/tx/{signature}'>View on Solscan</a>"
+                    )
+                )
+                logger.success(
+                    "[{wallet}] {side} {sent_amount:.6f} {sent_symbol} to [{to_address}]"
+                    " | {label} >>> https://solscan.io/tx/{signature} |",
+                    wallet=parsed_transaction.wallet, side=parsed_transaction.side,
+                    sent_amount=parsed_transaction.sent_amount, sent_symbol=sent_token_symbol,
+                    to_address=parsed_transaction.to_address, label=route.label, signature=signature
+                )
+        elif parsed_transaction.side == "SKIPPED":
+            deliver(
+                route, parsed_transaction,
+                received_at=received_at,
+                text=(
+                    f"⚠️ <b>TRANSACTION SKIPPED</b>\n\n"
+                    f"👛 <b>Wallet:</b> {route.label}\n"
+                    f"📝 <b>Description:</b>\n"
+                    f"<i>{parsed_transaction.description}</i>\n\n"
+                    f"🔎 <a href='https://solscan.io/tx/{signature}'>Check on Solscan</a>"
+                )
+            )
+            logger.warning(
+                " <b>Transaction</b> [{signature}] {side}\n"
+                "📤 <b>Sent:</b> {sent_amount:.6f} {sent_symbol}\n"
+                "🔗 <b>Description:</b> {description} -- Check this tx manually for details."
+                "| {label} >>> https://solscan.io/tx/{signature} |",
+                signature=signature, wallet=parsed_transaction.wallet, side=parsed_transaction.side,
+                sent_amount=parsed_transaction.sent_amount, sent_symbol=sent_token_symbol,
+                description=parsed_transaction.description, label=route.label
+            )
+        elif parsed_transaction.side == "SWAP":
+            recv_token_symbol = "SOL" if parsed_transaction.recv_symbol == "WSOL" else parsed_transaction.recv_symbol
+            if sent_token_key in route.tokens:
+                deliver(
+                    route, parsed_transaction,
+                    received_at=received_at,
+                    text=(
+                        f"💱 <b>SWAP</b>\n\n"
+                        f"👛 <b>Wallet:</b> {route.label}\n"
+                        f"📤 <b>Sent:</b> {parsed_transaction.sent_amount:.6f} {sent_token_symbol}\n"
+                        f"📥 <b>Received:</b> {parsed_transaction.recv_amount:.9f} {recv_token_symbol}\n"
+                        f"🔄 <b>DEX:</b> {parsed_transaction.aggregator}\n\n"
+                        f"🔗 <a href='https://solscan.io/tx/{signature}'>View on Solscan</a>"
+                    )
+                )
+                logger.success(
+                    "[{side}] {sent_amount:.6f} {sent_symbol} → {recv_amount:.9f} {recv_symbol} ({aggregator}))"
+                    "| {label} >>> https://solscan.io/tx/{signature} |",
+                    wallet=parsed_transaction.wallet, side=parsed_transaction.side,
+                    sent_amount=parsed_transaction.sent_amount, sent_symbol=sent_token_symbol,
+                    recv_amount=parsed_transaction.recv_amount, recv_symbol=recv_token_symbol,
+                    aggregator=parsed_transaction.aggregator, label=route.label, signature=signature
+                )
+
+
+async def overflow_summaries():
+    """Once per rate-cap window: one message per capped wallet instead of the alerts it didn't get."""
     while True:
-        signature, wallet = await queue.get()
+        await asyncio.sleep(rate_cap.window)
+        for wallet, overflow in rate_cap.drain().items():
+            cap = wallet_policies.get(wallet).rate_cap
+            for route in routing_index.routes(wallet):
+                notifier.send(
+                    chat_id=route.telegram_id,
+                    parse_mode="HTML",
+                    text=(
+                        f"⏩ <b>{route.label}</b>: {overflow.count} more transactions in the last "
+                        f"{rate_cap.window:.0f}s were not shown individually (cap {cap})\n\n"
+                        f"👛 <a href='https://solscan.io/account/{wallet}'>Wallet on Solscan</a>\n"
+                        f"🔗 <a href='https://solscan.io/tx/{overflow.last_signature}'>Latest tx</a>"
+                    )
+                )
+            logger.info(f"⏩ [{wallet}] {overflow.count} txs over the cap of {cap}, summary sent")
+
+
+@dataclass(slots=True)
+class WorkerHandle:
+    stopping: bool = False
+    idle: bool = True   # parked on queue.get(), safe to cancel
+
+
+async def collect_batch(queue: IngestQueue, first: TxJob) -> list[TxJob]:
+    """Starting from `first`, keep gathering until the batch is full or the latency budget runs out."""
+    loop = asyncio.get_running_loop()
+    batch = [first]
+    deadline = loop.time() + config.tx_batch_latency_ms / 1000
+
+    while len(batch) < config.tx_batch_size:
         try:
-            async with semaphore:
-                parsed_transaction = await parse_transaction(signature, wallet, client)
-
-            if parsed_transaction:
-                for whitelist_user in config.whitelisted_user_ids:
-                    async with AsyncSession() as session:
-                        user = await session.scalar(
-                            select(User).where(User.telegram_id == whitelist_user)
-                        )
-                        if not user.enabled:
-                            logger.info(f"User {whitelist_user} is disabled. Skipping notification.")    
-                            continue
-
-                        user_wallet = await session.scalar(
-                            select(Wallet).where(Wallet.user_id == user.id,
-                                                 func.lower(Wallet.address) == parsed_transaction['wallet'].lower())
-                        )
-                        if not user_wallet:
-                            # logger.info(f"Wallet {parsed_transaction['wallet']} not found for user {whitelist_user}. Skipping notification.")
-                            continue
-
-                        if not user_wallet.enabled:
-                            logger.info(f"User {whitelist_user} is disabled. Skipping notification.")    
-                            continue
-                        sent_token_symbol = "SOL" if parsed_transaction['sent_symbol'] == "WSOL" else parsed_transaction['sent_symbol']
-                        user_token = await session.scalar(
-                            select(Token).where(Token.user_id == user.id,
-                                                func.lower(Token.symbol) == sent_token_symbol.lower())
-                        )
-
-                        if parsed_transaction['side'] == "TRANSFER":
-                            if user_token:
-                                if user_token.enabled:
-                                    await bot.send_message(
-                                        chat_id=user.telegram_id,
-                                        parse_mode="HTML",
-                                        text=(
-                                            f"📤 <b>TRANSFER</b>\n\n"
-                                            f"👛 <b>Wallet:</b> {user_wallet.label}\n"
-                                            f"📦 <b>Amount:</b> {parsed_transaction['sent_amount']:.6f} {sent_token_symbol}\n"
-                                            f"➡️ <b>To:</b> <code>{short(parsed_transaction['to_address'])}</code>\n\n"
-                                            f"🔗 <a href='https://solscan.io/tx/{signature}'>View on Solscan</a>"
-                                        )
-                                    )
-                                    logger.success(
-                                        f"[{parsed_transaction['wallet']}] {parsed_transaction['side']} "
-                                        f"{parsed_transaction['sent_amount']:.6f} {sent_token_symbol} "
-                                        f"to [{parsed_transaction['to_address']}]"
-                                        f" | {user_wallet.label} >>> https://solscan.io/tx/{signature} |"
-                                    )
-                        elif parsed_transaction['side'] == "SKIPPED":
-                            await bot.send_message(
-                                chat_id=user.telegram_id,
-                                parse_mode="HTML",
-                                text=(
-                                    f"⚠️ <b>TRANSACTION SKIPPED</b>\n\n"
-                                    f"👛 <b>Wallet:</b> {user_wallet.label}\n"
-                                    f"📝 <b>Description:</b>\n"
-                                    f"<i>{parsed_transaction['description']}</i>\n\n"
-                                    f"🔎 <a href='https://solscan.io/tx/{signature}'>Check on Solscan</a>"
-                                )
-                            )
-                            logger.warning(
-                                f" <b>Transaction</b> [{parsed_transaction['signature']}] {parsed_transaction['side']}\n"
-                                f"📤 <b>Sent:</b> {parsed_transaction['sent_amount']:.6f} {sent_token_symbol}\n"
-                                f"🔗 <b>Description:</b> {parsed_transaction['description']}" + " -- Check this tx manually for details."
-                                f"| {user_wallet.label} >>> https://solscan.io/tx/{signature} |"
-                            )
-                        elif parsed_transaction['side'] == "SWAP":
-                            recv_token_symbol = "SOL" if parsed_transaction['recv_symbol'] == "WSOL" else parsed_transaction['recv_symbol']
-                            if user_token:
-                                if user_token.enabled:
-                                    await bot.send_message(
-                                        chat_id=user.telegram_id,
-                                        parse_mode="HTML",
-                                        text=(
-                                            f"💱 <b>SWAP</b>\n\n"
-                                            f"👛 <b>Wallet:</b> {user_wallet.label}\n"
-                                            f"📤 <b>Sent:</b> {parsed_transaction['sent_amount']:.6f} {sent_token_symbol}\n"
-                                            f"📥 <b>Received:</b> {parsed_transaction['recv_amount']:.9f} {recv_token_symbol}\n"
-                                            f"🔄 <b>DEX:</b> {parsed_transaction['aggregator']}\n\n"
-                                            f"🔗 <a href='https://solscan.io/tx/{signature}'>View on Solscan</a>"
-                                        )
-                                    )
-                                    logger.success(
-                                        f"[{parsed_transaction['side']}] "
-                                        f"{parsed_transaction['sent_amount']:.6f} {sent_token_symbol} → "
-                                        f"{parsed_transaction['recv_amount']:.9f} {recv_token_symbol} "
-                                        f"({parsed_transaction['aggregator']}))"
-                                        f"| {user_wallet.label} >>> https://solscan.io/tx/{signature} |"
-                                    )
+            batch.append(queue.get_nowait())
+            continue
+        except asyncio.QueueEmpty:
+            pass
+
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        await asyncio.sleep(min(remaining, BATCH_POLL_INTERVAL))
+
+    return batch
 
-        except Exception as e:
-            logger.error(f"❌ {signature}: {type(e).__name__} {e}")
 
-        finally:
-            queue.task_done()
+def ack_all(queue: IngestQueue, jobs: list[TxJob]):
+    for job in jobs:
+        queue.ack(job)
+
+
+async def retry_or_ack(queue: IngestQueue, job: TxJob, reason: str):
+    # dead-lettered jobs are finished with as well
+    if not await retry_scheduler.schedule(job, reason):
+        queue.ack(job)
+        confirmations.settle(job.signature, job.wallet, "dropped, never confirmed")
+
+
+async def tx_worker(queue: IngestQueue, client, handle: WorkerHandle | None = None):
+    handle = handle or WorkerHandle()
+    while not handle.stopping:
+        handle.idle = True
+        first = await queue.get()
+        handle.idle = False
+
+        batch = await collect_batch(queue, first)
+        now = time.monotonic()
+        for job in batch:
+            load_stats.queue_wait.observe(now - job.queued_at)
+
+        pending = list(batch)   # jobs this batch still owes an ack or a retry
+        claimed: dict[str, set[str]] = {}   # signature -> wallets taken from the deduper
+        try:
+            # concurrency is bounded by the client's adaptive limit
+            started = time.monotonic()
+            transactions = await fetch_transactions([job.signature for job in batch], client)
+            load_stats.helius_latency.observe(time.monotonic() - started)
+
+            items, done = [], []
+            for job in batch:
+                tx = transactions.get(job.signature)
+                if tx is None:
+                    logger.warning("Tx {signature} not returned by Helius yet, retrying later",
+                                   signature=job.signature, wallet=job.wallet)
+                    # handed over: an error later in the batch must not schedule it again
+                    pending.remove(job)
+                    await retry_or_ack(queue, job, "not returned by Helius")
+                    continue
+                done.append(job)
+
+                # one fetch, fanned out to every wallet the tx was seen for
+                wallets = claimed[job.signature] = deduper.claim(job.signature, job.wallet)
+                for wallet in wallets:
+                    if config.fast_mode and tx.slot:
+                        # returned by the enhanced API, so at least confirmed
+                        cursor_store.update(wallet, job.signature, tx.slot)
+                    if tx.transaction_error:
+                        confirmations.settle(job.signature, wallet, "transaction failed")
+                        continue
+                    items.append((tx, wallet))
+
+            received = {job.signature: job.received_at for job in batch}
+            for parsed_transaction in await parse_transactions(items):
+                event_store.record(parsed_transaction)
+                try:
+                    await notify_users(parsed_transaction, received.get(parsed_transaction.signature))
+                except Exception as e:
+                    logger.error(f"❌ {parsed_transaction.signature} [{parsed_transaction.wallet}]: {type(e).__name__} {e}")
+            # provisional alerts the final parse didn't replace: dropped by the classifier or the token filter
+            for tx, wallet in items:
+                confirmations.settle(tx.signature, wallet, "not a tracked swap or transfer")
+
+            # parsed and handed to the notifier: the journal can forget them once the
+            # events are written, or a crash before the next flush would lose both the
+            # journal entry and the record that dedups a replay
+            event_store.after_flush(partial(ack_all, queue, done))
+
+        except Exception as e:
+            logger.error(f"❌ batch of {len(batch)}: {type(e).__name__} {e}")
+            for job in pending:
+                # hand the fan-out back, or the retried job would find every wallet done
+                deduper.release(job.signature, claimed.get(job.signature, set()))
+                await retry_or_ack(queue, job, f"{type(e).__name__} {e}")
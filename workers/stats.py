@@ -0,0 +1,28 @@
+# workers/stats.py
+from metrics import registry
+
+
+class Ewma:
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.value = 0.0
+
+    def observe(self, sample: float):
+        self.value += self.alpha * (sample - self.value)
+
+
+class LoadStats:
+    """Smoothed load signals the worker pool scales on."""
+
+    def __init__(self):
+        self.queue_wait = Ewma()
+        self.helius_latency = Ewma()
+        registry.gauge(
+            "tracker_queue_wait_seconds_ewma", "Smoothed time jobs spend in the ingest queue"
+        ).set_function(lambda: self.queue_wait.value)
+        registry.gauge(
+            "tracker_helius_latency_seconds_ewma", "Smoothed Helius /v0/transactions latency"
+        ).set_function(lambda: self.helius_latency.value)
+
+
+load_stats = LoadStats()